@@ -0,0 +1,187 @@
+"""
+Carts for visitors who are not logged in, kept in a signed cookie.
+
+An anonymous cart is just ``{product_id: quantity}``, signed and stored in
+the ``CART_COOKIE_NAME`` cookie, so browsing, bots and window-shopping
+never create sessions or ``Cart`` rows. ``AnonymousCart`` offers the same
+interface the views and ``cart_context`` use on ``Cart``. The item count
+comes straight from the cookie, and product data is loaded with one
+``IN`` query, only when lines or prices are needed. ``CartCookieMiddleware``
+writes the cookie back when a request changed the cart. A database cart is
+created once the visitor logs in.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+from django.utils.functional import cached_property
+
+from products.models import Product
+
+COOKIE_SALT = 'cart.anonymous'
+
+# Keep the signed cookie well under the 4 KB browsers accept
+MAX_LINES = 50
+MAX_QUANTITY = 99
+
+
+def cookie_name():
+    return getattr(settings, 'CART_COOKIE_NAME', 'cart')
+
+
+def cookie_age():
+    return getattr(settings, 'CART_COOKIE_AGE', 60 * 60 * 24 * 30)
+
+
+class CartFull(ValueError):
+    pass
+
+
+class CartLine:
+    """One anonymous cart line; its id is the product id"""
+
+    def __init__(self, product, quantity):
+        self.id = product.id
+        self.product = product
+        self.product_id = product.id
+        self.quantity = quantity
+
+    def get_total_price(self):
+        return self.quantity * self.product.price
+
+
+class AnonymousCart:
+    user = None
+
+    def __init__(self, quantities=None):
+        self.quantities = dict(quantities or {})
+        self.modified = False
+
+    @classmethod
+    def from_request(cls, request):
+        value = request.COOKIES.get(cookie_name())
+        if not value:
+            return cls()
+        try:
+            data = signing.loads(value, salt=COOKIE_SALT, max_age=cookie_age())
+            quantities = {
+                int(product_id): min(int(quantity), MAX_QUANTITY)
+                for product_id, quantity in data.items()
+                if int(quantity) > 0
+            }
+        except (signing.BadSignature, ValueError, TypeError, AttributeError):
+            return cls()
+        return cls(dict(list(quantities.items())[:MAX_LINES]))
+
+    def save(self, request, response):
+        if not self.quantities:
+            response.delete_cookie(cookie_name())
+            return
+        value = signing.dumps(
+            {str(product_id): quantity for product_id, quantity in self.quantities.items()},
+            salt=COOKIE_SALT,
+            compress=True
+        )
+        response.set_cookie(
+            cookie_name(), value,
+            max_age=cookie_age(),
+            secure=request.is_secure(),
+            httponly=True,
+            samesite='Lax'
+        )
+
+    @cached_property
+    def products(self):
+        products = Product.objects.filter(
+            id__in=self.quantities, is_active=True
+        ).select_related('category').in_bulk()
+        # Forget products that were deleted or withdrawn since they were added
+        for product_id in set(self.quantities) - set(products):
+            del self.quantities[product_id]
+            self.modified = True
+        return products
+
+    @property
+    def item_count(self):
+        return sum(self.quantities.values())
+
+    @property
+    def subtotal(self):
+        return sum((line.get_total_price() for line in self.lines()), Decimal('0.00'))
+
+    total_items = item_count
+    total_price = subtotal
+
+    def lines(self):
+        products = self.products
+        return [
+            CartLine(products[product_id], quantity)
+            for product_id, quantity in self.quantities.items()
+            if product_id in products
+        ]
+
+    def get_line(self, item_id):
+        quantity = self.quantities.get(item_id)
+        product = self.products.get(item_id) if quantity else None
+        return CartLine(product, quantity) if product else None
+
+    def _changed(self):
+        self.modified = True
+        self.__dict__.pop('products', None)
+
+    def add_product(self, product, quantity=1):
+        if product.id not in self.quantities and len(self.quantities) >= MAX_LINES:
+            raise CartFull(f'A cart can hold at most {MAX_LINES} different products')
+        self.quantities[product.id] = min(self.quantities.get(product.id, 0) + quantity, MAX_QUANTITY)
+        self._changed()
+
+    def set_quantity(self, item_id, quantity):
+        if item_id not in self.quantities:
+            raise LookupError('Cart item not found')
+        if quantity > 0:
+            self.quantities[item_id] = min(quantity, MAX_QUANTITY)
+        else:
+            del self.quantities[item_id]
+        self._changed()
+
+    def remove_item(self, item_id):
+        self.set_quantity(item_id, 0)
+
+    def apply_changes(self, operations):
+        """Apply add/set/remove operations; see ``Cart.apply_changes``"""
+        errors = []
+        added = {op.get('product_id') for op in operations if op['op'] == 'add'}
+        available = Product.objects.filter(id__in=added, is_active=True).in_bulk()
+        for op in operations:
+            product_id = op.get('item_id') or op.get('product_id')
+            quantity = op.get('quantity', 1)
+            if op['op'] not in ('add', 'set', 'remove'):
+                errors.append(f"Unknown operation {op['op']!r}")
+            elif op['op'] == 'add':
+                if quantity < 1:
+                    errors.append(f'Quantity for product {product_id} must be at least 1')
+                    continue
+                product = available.get(product_id)
+                if product is None or not product.is_in_stock:
+                    errors.append(f'Product {product_id} is not available')
+                    continue
+                try:
+                    self.add_product(product, quantity)
+                except CartFull as exc:
+                    errors.append(str(exc))
+            elif product_id not in self.quantities:
+                errors.append(f'Cart item {product_id} was not found')
+            else:
+                self.set_quantity(product_id, quantity if op['op'] == 'set' else 0)
+        return errors
+
+    def clear(self):
+        self.quantities = {}
+        self._changed()
+
+
+def anonymous_cart(request):
+    """The request's anonymous cart, shared by the views and cart_context"""
+    if not hasattr(request, '_anonymous_cart'):
+        request._anonymous_cart = AnonymousCart.from_request(request)
+    return request._anonymous_cart
@@ -1,31 +1,26 @@
+from django.utils.functional import SimpleLazyObject
+from .anonymous import anonymous_cart
 from .models import Cart
 
 
 def cart_context(request):
-    """Add cart information to template context"""
-    cart = None
-    total_items = 0
-    total_price = 0
-    
+    """Add cart information to template context
+
+    Everything is evaluated lazily, so pages that never show the cart run no
+    cart queries. A user's totals are stored on their cart row; a visitor's
+    item count is read from the cart cookie without touching the database.
+    """
     if request.user.is_authenticated:
-        try:
-            cart = Cart.objects.get(user=request.user)
-            total_items = cart.total_items
-            total_price = cart.total_price
-        except Cart.DoesNotExist:
-            pass
-    else:
-        # Handle session-based cart for anonymous users
-        if request.session.session_key:
-            try:
-                cart = Cart.objects.get(session_key=request.session.session_key)
-                total_items = cart.total_items
-                total_price = cart.total_price
-            except Cart.DoesNotExist:
-                pass
-    
+        cart = SimpleLazyObject(lambda: Cart.objects.filter(user=request.user).first())
+        return {
+            'cart': cart,
+            'cart_total_items': SimpleLazyObject(lambda: cart.item_count if cart else 0),
+            'cart_total_price': SimpleLazyObject(lambda: cart.subtotal if cart else 0),
+        }
+
+    cart = anonymous_cart(request)
     return {
         'cart': cart,
-        'cart_total_items': total_items,
-        'cart_total_price': total_price,
-    }
\ No newline at end of file
+        'cart_total_items': cart.item_count,
+        'cart_total_price': SimpleLazyObject(lambda: cart.subtotal),
+    }
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from cart import purge, reservations
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired stock holds in small batches. Expired holds already '
+        'stop counting against stock; this only keeps the table small.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=reservations.BATCH_SIZE,
+            help='Holds deleted per statement'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=purge.SLEEP,
+            help='Seconds to pause between batches'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        started = time.monotonic()
+        deleted = reservations.expire_holds(
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            stdout=self.stdout if options['verbosity'] > 1 else None
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired holds in {elapsed:.1f}s'))
@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from cart import purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete abandoned carts and expired sessions in small batches. '
+        'Safe to run from cron while the shop is serving traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Delete guest carts not updated for this many days'
+        )
+        parser.add_argument(
+            '--user-days', type=int,
+            help='Also delete logged-in users\' carts not updated for this many days'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=purge.BATCH_SIZE,
+            help='Rows deleted per transaction'
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=purge.SLEEP,
+            help='Seconds to pause between batches'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report what would be deleted without deleting it'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1 or (options['user_days'] is not None and options['user_days'] < 1):
+            raise CommandError('--days and --user-days must be at least 1')
+
+        stdout = self.stdout if options['verbosity'] > 1 else None
+        started = time.monotonic()
+        carts, items = purge.purge_abandoned_carts(
+            days=options['days'],
+            user_days=options['user_days'],
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            dry_run=options['dry_run'],
+            stdout=stdout
+        )
+        sessions = purge.purge_expired_sessions(
+            batch_size=options['batch_size'],
+            sleep=options['sleep'],
+            dry_run=options['dry_run'],
+            stdout=stdout
+        )
+        elapsed = time.monotonic() - started
+
+        verb = 'Would delete' if options['dry_run'] else 'Deleted'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'{verb} {carts} carts, {items} cart items and {sessions} expired sessions '
+                f'in {elapsed:.1f}s'
+            )
+        )
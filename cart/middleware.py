@@ -0,0 +1,12 @@
+class CartCookieMiddleware:
+    """Write the anonymous cart cookie back when the request changed the cart"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        cart = getattr(request, '_anonymous_cart', None)
+        if cart is not None and cart.modified:
+            cart.save(request, response)
+        return response
@@ -1,11 +1,57 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 from products.models import Product
 
 
+class LineExists(Exception):
+    """Another transaction created a line this one was about to insert"""
+
+
+def carts_containing(product_ids):
+    return Cart.objects.filter(
+        id__in=CartItem.objects.filter(product_id__in=product_ids).values('cart_id')
+    )
+
+
+def reprice_carts(product_ids):
+    """Re-total the carts holding any of ``product_ids`` after their prices changed
+
+    Product.save() does this through a signal; code that changes prices
+    with QuerySet.update() or bulk upserts must call it itself.
+    """
+    recalculate_totals(carts_containing(product_ids))
+
+
+def recalculate_totals(carts):
+    """Recompute the stored summary of a Cart queryset with one UPDATE"""
+    items = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+    carts.update(
+        item_count=Coalesce(
+            Subquery(items.annotate(total=Sum('quantity')).values('total')),
+            Value(0)
+        ),
+        subtotal=Coalesce(
+            Subquery(items.annotate(total=Sum(
+                F('quantity') * F('product__price'),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            )).values('total')),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ),
+    )
+
+
 class Cart(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField(max_length=40, null=True, blank=True)
+    # Maintained with F() updates by the methods below, never recomputed per request
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -16,14 +62,255 @@ class Cart(models.Model):
 
     @property
     def total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        return self.item_count
 
     @property
     def total_price(self):
-        return sum(item.get_total_price() for item in self.items.all())
+        return self.subtotal
+
+    def lines(self):
+        return list(self.items.select_related('product__category'))
+
+    def get_line(self, item_id):
+        return self.items.select_related('product').filter(id=item_id).first()
+
+    def _shift_totals(self, quantity, amount):
+        Cart.objects.filter(pk=self.pk).update(
+            item_count=F('item_count') + quantity,
+            subtotal=F('subtotal') + amount,
+            updated_at=timezone.now()
+        )
+
+    def refresh_totals(self):
+        self.item_count, self.subtotal = Cart.objects.filter(
+            pk=self.pk
+        ).values_list('item_count', 'subtotal').get()
+
+    def add_product(self, product, quantity=1):
+        """Add ``quantity`` of a product, creating its line if needed
+
+        The line's stock hold is raised to match; raises
+        reservations.InsufficientStock, changing nothing, if it cannot be.
+        """
+        from . import reservations
+
+        now = timezone.now()
+        lines = CartItem.objects.filter(cart=self, product=product)
+        with transaction.atomic():
+            if not lines.update(quantity=F('quantity') + quantity, updated_at=now):
+                try:
+                    with transaction.atomic():
+                        CartItem.objects.create(cart=self, product=product, quantity=quantity)
+                except IntegrityError:
+                    # A concurrent request created the line first
+                    lines.update(quantity=F('quantity') + quantity, updated_at=now)
+            reservations.hold(self, {product.id: lines.values_list('quantity', flat=True).get()})
+            self._shift_totals(quantity, quantity * product.price)
+        self.refresh_totals()
+
+    def set_quantity(self, item_id, quantity):
+        """Set a line's quantity, removing the line when it drops to zero
+
+        The line's stock hold follows the new quantity. Raises
+        CartItem.DoesNotExist if the line is not in this cart, and
+        reservations.InsufficientStock, changing nothing, if the hold cannot
+        cover it.
+        """
+        from . import reservations
+
+        with transaction.atomic():
+            item = CartItem.objects.select_for_update(of=('self',)).select_related('product').only(
+                'quantity', 'product__price'
+            ).get(pk=item_id, cart=self)
+            if quantity > 0:
+                CartItem.objects.filter(pk=item.pk).update(quantity=quantity, updated_at=timezone.now())
+            else:
+                CartItem.objects.filter(pk=item.pk).delete()
+                quantity = 0
+            reservations.hold(self, {item.product_id: quantity})
+            change = quantity - item.quantity
+            self._shift_totals(change, change * item.product.price)
+        self.refresh_totals()
+
+    def remove_item(self, item_id):
+        self.set_quantity(item_id, 0)
+
+    def apply_changes(self, operations):
+        """Apply a batch of add/set/remove operations in one transaction
+
+        Each operation is a dict with ``op`` ('add', 'set' or 'remove'),
+        ``product_id`` or (for set/remove) ``item_id``, and ``quantity``.
+        Lines and products are each read with one ``IN`` query and written
+        with one bulk_create, one bulk_update and one delete, so the cost
+        does not grow with the number of operations. The stock holds of the
+        changed lines are set to their new quantities in the same
+        transaction; a line whose hold cannot be raised is left as it was.
+        Returns a list of error messages for operations that were skipped.
+        """
+        try:
+            errors = self._apply_changes(operations)
+        except LineExists:
+            # A concurrent request created one of the new lines; the retry sees it
+            errors = self._apply_changes(operations)
+        self.refresh_totals()
+        return errors
+
+    def _apply_changes(self, operations):
+        from . import reservations
+
+        errors = []
+        item_ids = {op['item_id'] for op in operations if op.get('item_id')}
+        product_ids = {op['product_id'] for op in operations if op.get('product_id')}
+        now = timezone.now()
+
+        with transaction.atomic():
+            lines = {}
+            for item in CartItem.objects.select_for_update(of=('self',)).select_related('product').filter(
+                models.Q(id__in=item_ids) | models.Q(product_id__in=product_ids), cart=self
+            ).only('quantity', 'product__price', 'product__stock', 'product__stock_status', 'product__is_active'):
+                lines[item.product_id] = item
+            by_item_id = {item.id: item for item in lines.values()}
+            new_products = Product.objects.filter(
+                id__in=product_ids - set(lines), is_active=True
+            ).only('price', 'stock', 'stock_status', 'is_active').in_bulk()
+
+            original = {product_id: item.quantity for product_id, item in lines.items()}
+            prices = {product_id: item.product.price for product_id, item in lines.items()}
+            quantities = dict(original)
+            for op in operations:
+                item = by_item_id.get(op.get('item_id'))
+                product_id = item.product_id if item else op.get('product_id')
+                quantity = op.get('quantity', 1)
+                if op['op'] not in ('add', 'set', 'remove'):
+                    errors.append(f"Unknown operation {op['op']!r}")
+                elif op['op'] == 'add':
+                    if quantity < 1:
+                        errors.append(f'Quantity for product {product_id} must be at least 1')
+                        continue
+                    product = lines[product_id].product if product_id in lines else new_products.get(product_id)
+                    if product is None or not product.is_in_stock:
+                        errors.append(f'Product {product_id} is not available')
+                        continue
+                    prices[product_id] = product.price
+                    quantities[product_id] = quantities.get(product_id, 0) + quantity
+                elif product_id not in quantities:
+                    errors.append(f"Cart item {op.get('item_id') or product_id} was not found")
+                elif op['op'] == 'set':
+                    quantities[product_id] = max(quantity, 0)
+                else:
+                    quantities[product_id] = 0
+
+            changed = {
+                product_id: quantity for product_id, quantity in quantities.items()
+                if quantity != original.get(product_id, 0)
+            }
+            try:
+                reservations.hold(self, changed)
+            except reservations.InsufficientStock as exc:
+                errors.append(str(exc))
+                for product in exc.products:
+                    quantities[product.id] = original.get(product.id, 0)
+                reservations.hold(self, {
+                    product_id: quantities[product_id] for product_id in changed
+                    if quantities[product_id] != original.get(product_id, 0)
+                })
+
+            created, updated, removed = [], [], []
+            for product_id, quantity in quantities.items():
+                if product_id not in lines:
+                    if quantity > 0:
+                        created.append(CartItem(cart=self, product_id=product_id, quantity=quantity))
+                elif quantity == 0:
+                    removed.append(lines[product_id].id)
+                elif quantity != original[product_id]:
+                    lines[product_id].quantity = quantity
+                    lines[product_id].updated_at = now
+                    updated.append(lines[product_id])
+
+            try:
+                with transaction.atomic():
+                    CartItem.objects.bulk_create(created)
+            except IntegrityError:
+                if CartItem.objects.filter(cart=self, product_id__in=[item.product_id for item in created]).exists():
+                    raise LineExists()
+                raise
+            CartItem.objects.bulk_update(updated, ['quantity', 'updated_at'])
+            CartItem.objects.filter(id__in=removed).delete()
+
+            changes = [
+                (quantity - original.get(product_id, 0), prices[product_id])
+                for product_id, quantity in quantities.items()
+            ]
+            if any(change for change, price in changes):
+                self._shift_totals(
+                    sum(change for change, price in changes),
+                    sum(change * price for change, price in changes)
+                )
+        return errors
+
+    def merge_lines(self, quantities):
+        """Add ``{product_id: quantity}`` to this cart, summing with existing lines
+
+        Every line is written by one upsert whose conflict branch adds to the
+        stored quantity, so a line created concurrently is summed rather than
+        overwritten, and the stored totals are recomputed once, however many
+        lines are merged. The merged lines are held at their new quantities;
+        a line the available stock cannot cover is cut down to what is left,
+        or dropped. Returns the products whose lines were cut.
+        """
+        from . import reservations
+
+        short = []
+        with transaction.atomic():
+            product_ids = list(Product.objects.filter(
+                id__in=quantities, is_active=True
+            ).values_list('id', flat=True))
+            if product_ids:
+                now = connection.ops.adapt_datetimefield_value(timezone.now())
+                table = connection.ops.quote_name(CartItem._meta.db_table)
+                rows = ', '.join(['(%s, %s, %s, %s, %s)'] * len(product_ids))
+                params = [
+                    value
+                    for product_id in product_ids
+                    for value in (self.pk, product_id, quantities[product_id], now, now)
+                ]
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f'INSERT INTO {table} (cart_id, product_id, quantity, created_at, updated_at) '
+                        f'VALUES {rows} ON CONFLICT (cart_id, product_id) DO UPDATE SET '
+                        f'quantity = {table}.quantity + excluded.quantity, updated_at = excluded.updated_at',
+                        params
+                    )
+                merged = dict(
+                    CartItem.objects.filter(cart=self, product_id__in=product_ids).values_list('product_id', 'quantity')
+                )
+                try:
+                    reservations.hold(self, merged)
+                except reservations.InsufficientStock as exc:
+                    short = exc.products
+                    capped = {product.id: exc.available[product.id] for product in short}
+                    CartItem.objects.filter(
+                        cart=self, product_id__in=[product_id for product_id, left in capped.items() if not left]
+                    ).delete()
+                    CartItem.objects.filter(cart=self, product_id__in=capped).update(
+                        quantity=Case(
+                            *[When(product_id=product_id, then=Value(left)) for product_id, left in capped.items()],
+                            output_field=models.IntegerField()
+                        ),
+                        updated_at=timezone.now()
+                    )
+                    merged.update(capped)
+                    reservations.hold(self, merged)
+            recalculate_totals(Cart.objects.filter(pk=self.pk))
+        self.refresh_totals()
+        return short
 
     def clear(self):
-        self.items.all().delete()
+        with transaction.atomic():
+            self.items.all().delete()
+            self.reservations.all().delete()
+            Cart.objects.filter(pk=self.pk).update(item_count=0, subtotal=0, updated_at=timezone.now())
+        self.item_count, self.subtotal = 0, Decimal('0.00')
 
 
 class CartItem(models.Model):
@@ -43,12 +330,28 @@ class CartItem(models.Model):
         return self.quantity * self.product.price
 
     def increase_quantity(self, quantity=1):
-        self.quantity += quantity
-        self.save()
+        self.cart.add_product(self.product, quantity)
 
     def decrease_quantity(self, quantity=1):
-        if self.quantity > quantity:
-            self.quantity -= quantity
-            self.save()
-        else:
-            self.delete()
+        self.cart.set_quantity(self.pk, self.quantity - quantity)
+
+
+class StockReservation(models.Model):
+    """A short-lived hold on stock for one cart line; see cart.reservations"""
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='reservations')
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['cart', 'product']
+        indexes = [
+            # Units held on a product by unexpired reservations
+            models.Index(fields=['product', 'expires_at'], name='reservation_product_idx'),
+            # Batches of expired holds for the reaper
+            models.Index(fields=['expires_at', 'id'], name='reservation_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.product_id} held for cart {self.cart_id}"
@@ -0,0 +1,124 @@
+"""
+Short-lived stock holds for cart lines.
+
+Every change to a database cart line sets its ``StockReservation`` to the
+line's new quantity in the same transaction as the line write (see the
+``Cart`` methods), and starting checkout renews the holds of the whole
+cart. Holds expire after ``STOCK_HOLD_TTL`` seconds. A product's available
+stock is its ``stock`` minus the units held by unexpired reservations,
+summed through the ``(product, expires_at)`` index. Because an expired hold simply stops counting, availability never
+depends on the reaper having run and cannot drift when carts are purged;
+``expire_holds`` only keeps the table small.
+
+Placing a hold locks the product rows, in id order, for the few statements
+it takes to check availability and upsert the holds. That serialises
+shoppers of one SKU on its row just long enough to stop two of them
+holding the last unit, without ever waiting on a checkout or page view.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from products.models import Product
+from . import purge
+from .models import StockReservation
+
+BATCH_SIZE = 1000
+
+
+def hold_ttl():
+    return timedelta(seconds=getattr(settings, 'STOCK_HOLD_TTL', 60 * 15))
+
+
+class InsufficientStock(ValueError):
+    def __init__(self, products, available):
+        self.products = products
+        self.available = available
+        names = ', '.join(f'{product.name} ({available[product.id]} left)' for product in products)
+        super().__init__(f'Not enough stock available for: {names}')
+
+
+def active_holds(product_ids, exclude_cart=None, now=None):
+    """Units held on each product by unexpired reservations"""
+    holds = StockReservation.objects.filter(product_id__in=product_ids, expires_at__gt=now or timezone.now())
+    if exclude_cart is not None:
+        holds = holds.exclude(cart=exclude_cart)
+    return dict(holds.order_by().values('product_id').annotate(total=Sum('quantity')).values_list('product_id', 'total'))
+
+
+def available_stock(product_ids, exclude_cart=None):
+    """``{product_id: units}`` that can still be added to a cart or bought"""
+    stock = dict(Product.objects.filter(id__in=product_ids).values_list('id', 'stock'))
+    held = active_holds(stock, exclude_cart)
+    return {product_id: max(units - held.get(product_id, 0), 0) for product_id, units in stock.items()}
+
+
+def hold(cart, quantities):
+    """Hold ``{product_id: quantity}`` for ``cart``, replacing its previous holds on those products
+
+    Quantities are whole line quantities; zero releases the product. Every
+    hold in the call is renewed for another ``STOCK_HOLD_TTL``. Raises
+    InsufficientStock, changing nothing, if any product cannot cover its
+    quantity on top of other carts' holds.
+    """
+    now = timezone.now()
+    wanted = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    with transaction.atomic():
+        products = {
+            product.id: product
+            for product in Product.objects.select_for_update().filter(
+                id__in=wanted, is_active=True
+            ).only('name', 'stock').order_by('id')
+        }
+        held = active_holds(wanted, exclude_cart=cart, now=now)
+        available = {
+            product_id: max(products[product_id].stock - held.get(product_id, 0), 0) if product_id in products else 0
+            for product_id in wanted
+        }
+        short = [product_id for product_id, quantity in wanted.items() if available[product_id] < quantity]
+        if short:
+            raise InsufficientStock(
+                [products.get(product_id) or Product(id=product_id, name=f'Product {product_id}') for product_id in short],
+                available
+            )
+
+        StockReservation.objects.bulk_create(
+            [
+                StockReservation(cart=cart, product_id=product_id, quantity=quantity, expires_at=now + hold_ttl())
+                for product_id, quantity in wanted.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['cart', 'product'],
+            update_fields=['quantity', 'expires_at'],
+        )
+        released = set(quantities) - set(wanted)
+        if released:
+            StockReservation.objects.filter(cart=cart, product_id__in=released).delete()
+
+
+def hold_cart(cart):
+    """Hold every line of ``cart`` at its current quantity, as checkout starts"""
+    quantities = dict(cart.items.values_list('product_id', 'quantity'))
+    with transaction.atomic():
+        hold(cart, quantities)
+        cart.reservations.exclude(product_id__in=quantities).delete()
+
+
+def release(cart, product_ids=None):
+    """Drop the cart's holds, or only those on ``product_ids``"""
+    holds = cart.reservations.all()
+    if product_ids is not None:
+        holds = holds.filter(product_id__in=product_ids)
+    holds.delete()
+
+
+def expire_holds(batch_size=BATCH_SIZE, sleep=purge.SLEEP, stdout=None):
+    """Delete expired holds in short batches; returns how many were deleted
+
+    A hold renewed since a batch was scanned is no longer expired and survives.
+    """
+    expired = StockReservation.objects.filter(expires_at__lte=timezone.now())
+    return purge.delete_in_batches(expired, ['expires_at', 'id'], 'expired holds', batch_size, sleep, stdout)
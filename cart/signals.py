@@ -0,0 +1,72 @@
+from collections import Counter
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+from products.models import Product
+from .anonymous import anonymous_cart
+from .models import Cart, CartItem, recalculate_totals, reprice_carts
+
+
+# Stored cart subtotals are priced at the current product price
+@receiver(pre_save, sender=Product)
+def remember_previous_price(sender, instance, **kwargs):
+    instance._previous_price = None
+    if instance.pk:
+        instance._previous_price = Product.objects.filter(
+            pk=instance.pk
+        ).values_list('price', flat=True).first()
+
+
+@receiver(post_save, sender=Product)
+def reprice_carts_on_price_change(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_price', None)
+    if not created and previous is not None and previous != instance.price:
+        reprice_carts([instance.pk])
+
+
+# Deleting a product cascades to cart lines without going through Cart
+@receiver(pre_delete, sender=Product)
+def remember_affected_carts(sender, instance, **kwargs):
+    instance._cart_ids = list(
+        CartItem.objects.filter(product=instance).values_list('cart_id', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def recalculate_affected_carts(sender, instance, **kwargs):
+    cart_ids = getattr(instance, '_cart_ids', None)
+    if cart_ids:
+        recalculate_totals(Cart.objects.filter(id__in=cart_ids))
+
+
+# The visitor's cart becomes part of the user's database cart at login
+@receiver(user_logged_in)
+def merge_anonymous_cart(sender, request, user, **kwargs):
+    if request is None:
+        return
+    anonymous = anonymous_cart(request)
+    quantities = Counter(anonymous.quantities)
+
+    # Carts from before cookie carts are keyed by the pre-login session,
+    # which login() has already replaced, so read it from the request cookie
+    session_key = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    session_carts = Cart.objects.filter(session_key=session_key, user=None) if session_key else Cart.objects.none()
+    for product_id, quantity in CartItem.objects.filter(cart__in=session_carts).values_list('product_id', 'quantity'):
+        quantities[product_id] += quantity
+
+    if quantities:
+        cart, created = Cart.objects.get_or_create(user=user)
+        short = cart.merge_lines(quantities)
+        session_carts.delete()
+        if short:
+            messages.warning(
+                request,
+                'Some items in your cart were reduced to the stock left: '
+                + ', '.join(product.name for product in short),
+                fail_silently=True
+            )
+    if anonymous.quantities:
+        anonymous.clear()
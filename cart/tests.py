@@ -1,3 +1,143 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import signing
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from products.models import Category, Product
+from . import reservations
+from .anonymous import COOKIE_SALT, cookie_name
+from .models import Cart, StockReservation
+
+
+class ReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Toys', slug='toys')
+        cls.product = Product.objects.create(
+            name='Ball', slug='ball', description='A ball', price=Decimal('5.00'), category=category, stock=2
+        )
+
+    def setUp(self):
+        self.cart = Cart.objects.create(user=User.objects.create_user('first'))
+        self.other = Cart.objects.create(user=User.objects.create_user('second'))
+
+    def held(self, cart):
+        return dict(cart.reservations.values_list('product_id', 'quantity'))
+
+    def test_adding_holds_stock_from_other_carts(self):
+        self.cart.add_product(self.product, 2)
+
+        self.assertEqual(self.held(self.cart), {self.product.pk: 2})
+        self.assertEqual(reservations.available_stock([self.product.pk]), {self.product.pk: 0})
+        with self.assertRaises(reservations.InsufficientStock):
+            self.other.add_product(self.product, 1)
+        self.assertFalse(self.other.items.exists())
+        self.assertEqual(self.other.item_count, 0)
+
+    def test_expired_holds_stop_counting(self):
+        self.cart.add_product(self.product, 2)
+        StockReservation.objects.filter(cart=self.cart).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.other.add_product(self.product, 1)
+
+        self.assertEqual(self.held(self.other), {self.product.pk: 1})
+        self.assertEqual(reservations.expire_holds(sleep=0), 1)
+        self.assertEqual(self.held(self.cart), {})
+
+    def test_holds_follow_quantity_changes(self):
+        self.cart.add_product(self.product, 2)
+        item = self.cart.items.get()
+
+        self.cart.set_quantity(item.pk, 1)
+        self.assertEqual(self.held(self.cart), {self.product.pk: 1})
+        self.other.add_product(self.product, 1)
+
+        with self.assertRaises(reservations.InsufficientStock):
+            self.cart.set_quantity(item.pk, 2)
+        self.assertEqual(self.cart.items.get().quantity, 1)
+
+        self.cart.remove_item(item.pk)
+        self.assertEqual(self.held(self.cart), {})
+
+    def test_batch_leaves_lines_it_cannot_hold(self):
+        self.other.add_product(self.product, 1)
+
+        errors = self.cart.apply_changes([
+            {'op': 'add', 'product_id': self.product.pk, 'quantity': 2},
+            {'op': 'add', 'product_id': self.product.pk, 'quantity': -1},
+        ])
+
+        self.assertEqual(len(errors), 2)
+        self.assertFalse(self.cart.items.exists())
+        self.assertEqual(self.held(self.cart), {})
+
+    def test_merged_lines_are_held_and_capped(self):
+        self.other.add_product(self.product, 1)
+
+        short = self.cart.merge_lines({self.product.pk: 3})
+
+        self.assertEqual([product.pk for product in short], [self.product.pk])
+        self.assertEqual(self.cart.items.get().quantity, 1)
+        self.assertEqual(self.held(self.cart), {self.product.pk: 1})
+        self.assertEqual((self.cart.item_count, self.cart.subtotal), (1, Decimal('5.00')))
+
+
+
+class CartTotalTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Toys', slug='toys')
+        cls.product = Product.objects.create(
+            name='Ball', slug='ball', description='A ball', price=Decimal('5.00'), category=category, stock=10
+        )
+
+    def test_price_change_reprices_carts(self):
+        cart = Cart.objects.create(user=User.objects.create_user('shopper'))
+        cart.add_product(self.product, 3)
+
+        self.product.price = Decimal('4.00')
+        self.product.save()
+
+        cart.refresh_totals()
+        self.assertEqual((cart.item_count, cart.subtotal), (3, Decimal('12.00')))
+
+
+class LoginMergeTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Toys', slug='toys')
+        cls.ball = Product.objects.create(
+            name='Ball', slug='ball', description='A ball', price=Decimal('5.00'), category=category, stock=20
+        )
+        cls.kite = Product.objects.create(
+            name='Kite', slug='kite', description='A kite', price=Decimal('12.50'), category=category, stock=20
+        )
+        cls.user = User.objects.create_user('shopper', password='secret')
+
+    def test_login_sums_cookie_and_session_carts_into_the_user_cart(self):
+        cart = Cart.objects.create(user=self.user)
+        cart.add_product(self.ball, 1)
+        session_cart = Cart.objects.create(session_key='legacy-session')
+        session_cart.add_product(self.ball, 2)
+        session_cart.add_product(self.kite, 1)
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = 'legacy-session'
+        self.client.cookies[cookie_name()] = signing.dumps(
+            {str(self.ball.pk): 3, str(self.kite.pk): 1}, salt=COOKIE_SALT, compress=True
+        )
+
+        response = self.client.post(reverse('accounts:login'), {'username': 'shopper', 'password': 'secret'})
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            dict(cart.items.values_list('product_id', 'quantity')),
+            {self.ball.pk: 6, self.kite.pk: 2}
+        )
+        cart.refresh_totals()
+        self.assertEqual((cart.item_count, cart.subtotal), (8, Decimal('55.00')))
+        self.assertFalse(Cart.objects.filter(pk=session_cart.pk).exists())
+        self.assertEqual(response.cookies[cookie_name()].value, '')
@@ -11,6 +11,7 @@ urlpatterns = [
     path('add/', views.add_to_cart, name='add_to_cart'),
     path('remove/', views.remove_from_cart, name='remove_from_cart'),
     path('update/', views.update_cart, name='update_cart'),
+    path('batch/', views.batch_update_cart, name='batch_update_cart'),
     
     # Form-based endpoints (fallback)
     path('add-form/<int:product_id>/', views.add_to_cart_form, name='add_to_cart_form'),
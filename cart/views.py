@@ -1,34 +1,30 @@
 from django.shortcuts import render, get_object_or_404, redirect
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
 from django.contrib import messages
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 import json
-from .models import Cart, CartItem
+from . import reservations
+from .anonymous import CartFull, anonymous_cart
+from .models import Cart
 from products.models import Product
 
 
 def get_or_create_cart(request):
-    """Get or create cart for user or session"""
+    """Get or create the user's cart, or the visitor's cookie-backed cart"""
     if request.user.is_authenticated:
         cart, created = Cart.objects.get_or_create(user=request.user)
-    else:
-        # Create session if it doesn't exist
-        if not request.session.session_key:
-            request.session.create()
-        
-        cart, created = Cart.objects.get_or_create(
-            session_key=request.session.session_key
-        )
+        return cart
     
-    return cart
+    # Anonymous carts live in a signed cookie until the visitor logs in
+    return anonymous_cart(request)
 
 
 def cart_detail(request):
     """Display cart contents"""
     cart = get_or_create_cart(request)
-    cart_items = cart.items.select_related('product')
+    cart_items = cart.lines()
     
     context = {
         'cart': cart,
@@ -55,15 +51,7 @@ def add_to_cart(request):
             })
         
         cart = get_or_create_cart(request)
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={'quantity': quantity}
-        )
-        
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
+        cart.add_product(product, quantity)
         
         return JsonResponse({
             'success': True,
@@ -87,8 +75,7 @@ def remove_from_cart(request):
         cart_item_id = data.get('cart_item_id')
         
         cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=cart_item_id, cart=cart)
-        cart_item.delete()
+        cart.remove_item(int(cart_item_id))
         
         return JsonResponse({
             'success': True,
@@ -119,10 +106,7 @@ def update_cart(request):
             })
         
         cart = get_or_create_cart(request)
-        cart_item = get_object_or_404(CartItem, id=cart_item_id, cart=cart)
-        
-        cart_item.quantity = quantity
-        cart_item.save()
+        cart.set_quantity(int(cart_item_id), quantity)
         
         return JsonResponse({
             'success': True,
@@ -138,6 +122,38 @@ def update_cart(request):
         })
 
 
+@require_POST
+def batch_update_cart(request):
+    """Apply several add/set/remove operations via AJAX in one request"""
+    try:
+        data = json.loads(request.body)
+        operations = [
+            {
+                'op': op['op'],
+                'item_id': int(op['item_id']) if op.get('item_id') else None,
+                'product_id': int(op['product_id']) if op.get('product_id') else None,
+                'quantity': int(op.get('quantity', 1)),
+            }
+            for op in data.get('operations', [])
+        ]
+        
+        cart = get_or_create_cart(request)
+        errors = cart.apply_changes(operations)
+        
+        return JsonResponse({
+            'success': not errors,
+            'errors': errors,
+            'cart_total_items': cart.total_items,
+            'cart_total_price': float(cart.total_price)
+        })
+        
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': str(e)
+        })
+
+
 def clear_cart(request):
     """Clear all items from cart"""
     cart = get_or_create_cart(request)
@@ -157,15 +173,14 @@ def add_to_cart_form(request, product_id):
         return redirect('products:product_detail', slug=product.slug)
     
     cart = get_or_create_cart(request)
-    cart_item, created = CartItem.objects.get_or_create(
-        cart=cart,
-        product=product,
-        defaults={'quantity': quantity}
-    )
-    
-    if not created:
-        cart_item.quantity += quantity
-        cart_item.save()
+    try:
+        cart.add_product(product, quantity)
+    except reservations.InsufficientStock as exc:
+        messages.error(request, str(exc))
+        return redirect('products:product_detail', slug=product.slug)
+    except CartFull as exc:
+        messages.error(request, str(exc))
+        return redirect('cart:cart_detail')
     
     messages.success(request, f'{product.name} added to cart!')
     return redirect('cart:cart_detail')
@@ -174,9 +189,11 @@ def add_to_cart_form(request, product_id):
 def remove_from_cart_form(request, cart_item_id):
     """Remove item from cart via form submission"""
     cart = get_or_create_cart(request)
-    cart_item = get_object_or_404(CartItem, id=cart_item_id, cart=cart)
+    cart_item = cart.get_line(cart_item_id)
+    if cart_item is None:
+        raise Http404('Cart item not found')
     product_name = cart_item.product.name
-    cart_item.delete()
+    cart.remove_item(cart_item.id)
     
     messages.success(request, f'{product_name} removed from cart!')
     return redirect('cart:cart_detail')
@@ -186,20 +203,15 @@ def update_cart_form(request):
     """Update cart quantities via form submission"""
     cart = get_or_create_cart(request)
     
-    for key, value in request.POST.items():
-        if key.startswith('quantity_'):
-            cart_item_id = key.split('_')[1]
-            quantity = int(value)
-            
-            try:
-                cart_item = CartItem.objects.get(id=cart_item_id, cart=cart)
-                if quantity > 0:
-                    cart_item.quantity = quantity
-                    cart_item.save()
-                else:
-                    cart_item.delete()
-            except CartItem.DoesNotExist:
-                continue
+    operations = [
+        {'op': 'set', 'item_id': int(key.split('_')[1]), 'quantity': int(value)}
+        for key, value in request.POST.items()
+        if key.startswith('quantity_')
+    ]
+    errors = cart.apply_changes(operations)
     
-    messages.success(request, 'Cart updated successfully!')
+    for error in errors:
+        messages.error(request, error)
+    if not errors:
+        messages.success(request, 'Cart updated successfully!')
     return redirect('cart:cart_detail')
@@ -0,0 +1,60 @@
+"""
+Precomputed homepage context.
+
+The featured products and categories shown on the homepage are built once
+and kept in the cache under a versioned key. Catalog signals bump the
+version when something the homepage shows changes, and the warm_homepage
+command rebuilds it ahead of traffic after a deploy.
+"""
+from django.core.cache import cache
+
+from products.models import Category, Product
+
+from . import versions
+
+VERSION_KEY = 'core:home:version'
+CONTEXT_KEY = 'core:home:context:{}'
+CONTEXT_TIMEOUT = 60 * 60
+
+FEATURED_LIMIT = 8
+CATEGORY_LIMIT = 6
+
+
+def current_version():
+    return versions.current(VERSION_KEY)
+
+
+def build_context():
+    return {
+        'featured_products': list(
+            Product.objects.filter(
+                featured=True,
+                is_active=True
+            ).select_related('category')[:FEATURED_LIMIT]
+        ),
+        'categories': list(Category.objects.all()[:CATEGORY_LIMIT]),
+    }
+
+
+def warm():
+    """Build the context for the current version and store it"""
+    context = build_context()
+    cache.set(CONTEXT_KEY.format(current_version()), context, CONTEXT_TIMEOUT)
+    return context
+
+
+def get_context():
+    context = cache.get(CONTEXT_KEY.format(current_version()))
+    if context is None:
+        context = warm()
+    return context
+
+
+def shown_product_ids():
+    """Ids of the products in the cached homepage, if it is cached"""
+    context = cache.get(CONTEXT_KEY.format(current_version())) or {}
+    return {product.id for product in context.get('featured_products', [])}
+
+
+def invalidate():
+    versions.bump(VERSION_KEY)
@@ -1,4 +1,14 @@
-from django.core.management.base import BaseCommand
+import time
+from multiprocessing import Pool
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.utils import timezone
+from core import homepage, sample_data
+from products import facets, fragments, search, suggest
 from products.models import Category, Product
 from decimal import Decimal
 
@@ -6,7 +16,32 @@ from decimal import Decimal
 class Command(BaseCommand):
     help = 'Create sample data for the ecommerce site'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scale', type=int,
+            help='Generate this many synthetic products plus proportional categories, '
+                 'users, reviews, carts and orders instead of the fixed sample set'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed; the same seed and scale always produce the same data'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Processes used to generate rows (writes always happen in this process)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Parent rows generated and written per transaction'
+        )
+
     def handle(self, *args, **options):
+        if options['scale'] is not None:
+            if options['scale'] < 1:
+                raise CommandError('--scale must be a positive number of products')
+            self.create_scaled_data(options)
+            return
+
         self.stdout.write(self.style.SUCCESS('Creating sample data...'))
 
         # Create categories
@@ -175,4 +210,84 @@ class Command(BaseCommand):
                 f'Categories: {len(categories_data)}, '
                 f'Products: {len(products_data)}'
             )
-        )
\ No newline at end of file
+        )
+
+    def create_scaled_data(self, options):
+        counts = sample_data.scale_counts(options['scale'])
+        plan = {
+            'seed': options['seed'],
+            'counts': counts,
+            'ids': sample_data.next_ids(),
+            'now': timezone.now(),
+            # Hashing a password per user would dominate the run
+            'password': make_password('password'),
+        }
+        batch_size = options['batch_size']
+        self.stdout.write(
+            'Generating ' + ', '.join(f'{count} {stage}' for stage, count in counts.items()) + '...'
+        )
+
+        tasks = [
+            (stage, start, min(start + batch_size, counts[stage]), plan)
+            for stage in sample_data.STAGES
+            for start in range(0, counts[stage], batch_size)
+        ]
+        started = time.monotonic()
+        written = 0
+        pool = None
+        if options['workers'] > 1:
+            # Forked workers must not share this process's database connection
+            connections.close_all()
+            pool = Pool(options['workers'], initializer=django.setup)
+            chunks = pool.imap(sample_data.generate_chunk, tasks)
+        else:
+            chunks = map(sample_data.generate_chunk, tasks)
+
+        try:
+            with sample_data.explicit_timestamps():
+                for (stage, start, stop, _), rows in zip(tasks, chunks):
+                    written += self.write_chunk(rows, batch_size)
+                    if stop == counts[stage] or options['verbosity'] > 1:
+                        elapsed = time.monotonic() - started
+                        self.stdout.write(
+                            f'{stage}: {stop}/{counts[stage]} '
+                            f'({written} rows, {written / elapsed:.0f} rows/sec)'
+                        )
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        self.reset_sequences()
+        # bulk_create sends no signals, so rebuild what they would have maintained
+        self.stdout.write('Rebuilding search index...')
+        search.rebuild_index()
+        facets.invalidate()
+        fragments.bump_catalog_version()
+        suggest.publish_bulk_change()
+        homepage.invalidate()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Created {written} rows in {elapsed:.1f}s ({written / elapsed:.0f} rows/sec). '
+                f'Run build_related_products to materialize related products.'
+            )
+        )
+
+    def write_chunk(self, rows, batch_size):
+        written = 0
+        with transaction.atomic():
+            for model in sample_data.WRITE_ORDER:
+                objects = [model(**fields) for fields in rows.get(model._meta.label, [])]
+                model.objects.bulk_create(objects, batch_size=batch_size)
+                written += len(objects)
+        return written
+
+    def reset_sequences(self):
+        """Move id sequences past the explicitly assigned primary keys"""
+        statements = connection.ops.sequence_reset_sql(no_style(), sample_data.WRITE_ORDER)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
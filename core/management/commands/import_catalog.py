@@ -0,0 +1,207 @@
+import csv
+import json
+import time
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from cart.models import reprice_carts
+from core import homepage
+from products import facets, fragments, search, suggest
+from products.models import Category, Product
+
+STOCK_STATUSES = {key for key, label in Product.STOCK_STATUS_CHOICES}
+
+# Columns compared with, and overwritten on, a product with the same slug
+DATA_FIELDS = [
+    'name', 'description', 'price', 'category_id', 'stock', 'stock_status',
+    'is_active', 'featured',
+]
+UPDATE_FIELDS = [
+    'name', 'description', 'price', 'category', 'stock', 'stock_status',
+    'is_active', 'featured', 'updated_at',
+]
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+def parse_bool(value, default):
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+class Command(BaseCommand):
+    help = 'Stream a CSV or JSONL product feed into the catalog, upserting by slug'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file to import')
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='Input format (default: from the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=2000,
+            help='Number of products upserted per transaction'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} does not exist')
+        fmt = options['format'] or ('jsonl' if path.suffix in ('.jsonl', '.ndjson') else 'csv')
+        batch_size = options['batch_size']
+
+        self.category_ids = dict(Category.objects.values_list('slug', 'id'))
+        self.errors = 0
+        self.unchanged = 0
+        imported = 0
+        started = time.monotonic()
+
+        batch = {}
+        with path.open(newline='', encoding='utf-8') as handle:
+            for line_number, row in enumerate(self.read_rows(handle, fmt), start=1):
+                product = self.build_product(row, line_number)
+                if product is None:
+                    continue
+                # Later rows for the same slug win, and each slug is upserted once per batch
+                batch[product.slug] = product
+                if len(batch) >= batch_size:
+                    imported += self.flush(batch)
+                    batch = {}
+                    self.report(imported, started)
+        imported += self.flush(batch)
+
+        # bulk_create sends no signals, so refresh the caches built from them once
+        if imported > self.unchanged:
+            facets.invalidate()
+            fragments.bump_catalog_version()
+            suggest.publish_bulk_change()
+            homepage.invalidate()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {imported} products in {elapsed:.1f}s '
+                f'({imported / elapsed if elapsed else 0:.0f} rows/sec), {self.unchanged} unchanged, '
+                f'{self.errors} rows skipped'
+            )
+        )
+
+    def read_rows(self, handle, fmt):
+        if fmt == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+
+    def skip(self, line_number, message):
+        self.errors += 1
+        if self.errors <= 20:
+            self.stderr.write(f'Row {line_number}: {message}')
+
+    def category_id(self, row):
+        slug = (row.get('category') or '').strip()
+        if not slug:
+            return None
+        if slug not in self.category_ids:
+            name = (row.get('category_name') or slug.replace('-', ' ').title()).strip()
+            Category.objects.bulk_create([Category(name=name, slug=slug)], ignore_conflicts=True)
+            category_id = Category.objects.filter(slug=slug).values_list('id', flat=True).first()
+            if category_id is None:
+                return None
+            self.category_ids[slug] = category_id
+        return self.category_ids[slug]
+
+    def build_product(self, row, line_number):
+        if not isinstance(row, dict):
+            self.skip(line_number, 'not a JSON object')
+            return None
+        slug = (row.get('slug') or '').strip()
+        name = (row.get('name') or '').strip()
+        if not slug or not name:
+            self.skip(line_number, 'slug and name are required')
+            return None
+
+        try:
+            price = Decimal(str(row.get('price') or '0')).quantize(Decimal('0.01'))
+            if not price.is_finite():
+                # NaN survives quantize() but fails every comparison
+                raise InvalidOperation
+            stock = int(row.get('stock') or 0)
+        except (InvalidOperation, ValueError):
+            self.skip(line_number, 'invalid price or stock')
+            return None
+        if price < 0 or stock < 0:
+            self.skip(line_number, 'price and stock must not be negative')
+            return None
+
+        category_id = self.category_id(row)
+        if category_id is None:
+            self.skip(line_number, f"unknown category {row.get('category')!r}")
+            return None
+
+        stock_status = row.get('stock_status') or 'in_stock'
+        if stock_status not in STOCK_STATUSES:
+            self.skip(line_number, f'invalid stock_status {stock_status!r}')
+            return None
+
+        return Product(
+            slug=slug,
+            name=name,
+            description=row.get('description') or '',
+            price=price,
+            category_id=category_id,
+            stock=stock,
+            stock_status=stock_status,
+            is_active=parse_bool(row.get('is_active'), True),
+            featured=parse_bool(row.get('featured'), False),
+        )
+
+    def flush(self, batch):
+        """Upsert the batch's new and changed products; returns how many rows it read"""
+        if not batch:
+            return 0
+        with transaction.atomic():
+            # Leave identical rows alone so their updated_at, and the ETags
+            # and fragment versions built on it, survive a re-import
+            existing = {
+                row[0]: row[1:]
+                for row in Product.objects.filter(slug__in=list(batch)).values_list('slug', *DATA_FIELDS)
+            }
+            changed = [
+                product for slug, product in batch.items()
+                if existing.get(slug) != tuple(getattr(product, field) for field in DATA_FIELDS)
+            ]
+            self.unchanged += len(batch) - len(changed)
+            if changed:
+                Product.objects.bulk_create(
+                    changed,
+                    update_conflicts=True,
+                    unique_fields=['slug'],
+                    update_fields=UPDATE_FIELDS,
+                )
+                search.index_products(Product.objects.filter(slug__in=[product.slug for product in changed]))
+                # The upsert sends no signals, so re-total carts holding repriced products
+                price = DATA_FIELDS.index('price')
+                repriced = [
+                    product.slug for product in changed
+                    if product.slug in existing and existing[product.slug][price] != product.price
+                ]
+                if repriced:
+                    reprice_carts(Product.objects.filter(slug__in=repriced).values('id'))
+        return len(batch)
+
+    def report(self, imported, started):
+        elapsed = time.monotonic() - started
+        rate = imported / elapsed if elapsed else 0
+        self.stdout.write(f'Imported {imported} products ({rate:.0f} rows/sec)')
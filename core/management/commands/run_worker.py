@@ -0,0 +1,77 @@
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Run queued outbox events (order emails, stock alerts, ...) in a thread pool, '
+        'retrying failures with backoff. Run several workers for more throughput.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=4,
+            help='Handlers run concurrently'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Events claimed per round trip'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=1.0,
+            help='Seconds to wait before looking again when nothing is due'
+        )
+        parser.add_argument(
+            '--lease', type=int, default=int(outbox.LEASE.total_seconds()),
+            help='Seconds a claimed event stays reserved for this worker'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when no events are due instead of polling'
+        )
+        parser.add_argument(
+            '--retry-failed', action='store_true',
+            help='Queue events that used up their attempts again before starting'
+        )
+
+    def handle(self, *args, **options):
+        if options['threads'] < 1 or options['batch_size'] < 1:
+            raise CommandError('--threads and --batch-size must be at least 1')
+
+        if options['retry_failed']:
+            self.stdout.write(f'Queued {outbox.retry_failed()} failed events again')
+
+        worker = f'{socket.gethostname()[:40]}:{os.getpid()}'
+        lease = timedelta(seconds=options['lease'])
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+
+        processed = 0
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['threads'], thread_name_prefix='outbox') as pool:
+            try:
+                while not self.stopping:
+                    claimed = outbox.process_batch(pool, worker, options['batch_size'], lease)
+                    processed += claimed
+                    if claimed and options['verbosity'] > 1:
+                        self.stdout.write(f'Processed {processed} events')
+                    if not claimed:
+                        if options['once']:
+                            break
+                        time.sleep(options['poll'])
+            except KeyboardInterrupt:
+                pass
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} events in {elapsed:.1f}s'))
+
+    def stop(self, signum, frame):
+        # Finish the batch in hand, then exit
+        self.stopping = True
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from core import homepage
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the cached homepage context ahead of traffic. Run it after '
+        'deploys; it only reaches the web workers through a shared cache.'
+    )
+
+    def handle(self, *args, **options):
+        context = homepage.warm()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Homepage cached (version {homepage.current_version()}): '
+                f"{len(context['featured_products'])} featured products, "
+                f"{len(context['categories'])} categories"
+            )
+        )
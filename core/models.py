@@ -1,3 +1,36 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+
+class OutboxEvent(models.Model):
+    """A side effect to run after a transaction commits; see core.outbox"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    topic = models.CharField(max_length=100)
+    # Dotted path of the registered handler this event is delivered to
+    handler = models.CharField(max_length=200)
+    payload = models.JSONField(encoder=DjangoJSONEncoder, default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField()
+    # Lease taken by a worker while it runs the event
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Due events in the order workers claim them
+            models.Index(fields=['available_at', 'id'], condition=Q(status='pending'), name='outbox_due_idx'),
+            models.Index(fields=['locked_by'], condition=Q(status='pending'), name='outbox_lease_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.topic} -> {self.handler} ({self.status})"
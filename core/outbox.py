@@ -0,0 +1,136 @@
+"""
+Transactional outbox for side effects of a write.
+
+Code that must trigger slow or fallible work (emails, alerts, analytics)
+calls ``publish`` inside its own transaction. That writes one
+``OutboxEvent`` per handler registered for the topic, so the events exist
+exactly when the write that caused them committed, and the request never
+waits on the work itself. ``run_worker`` claims due events in batches,
+runs their handlers in a thread pool and retries failures with exponential
+backoff until ``MAX_ATTEMPTS``.
+
+Claiming takes a lease: the claimed rows get a unique ``locked_by`` token
+and a ``locked_until`` deadline in one UPDATE that only matches unleased or
+expired rows. On PostgreSQL the candidates are first selected with
+``SKIP LOCKED``, so concurrent workers never queue behind each other; on
+SQLite the claim is a single ``UPDATE ... WHERE id IN (SELECT ... LIMIT n)``,
+which takes the write lock up front instead of upgrading a read lock. A worker that dies
+loses its lease when it expires and the events are claimed again, so
+handlers must tolerate running more than once.
+"""
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+MAX_ATTEMPTS = 8
+
+# Retry delays double from BACKOFF_BASE up to BACKOFF_MAX, with jitter
+BACKOFF_BASE = timedelta(seconds=10)
+BACKOFF_MAX = timedelta(hours=1)
+
+LEASE = timedelta(minutes=5)
+
+
+def handler(topic):
+    """Register the decorated function to receive the payload of ``topic`` events"""
+    def register(func):
+        HANDLERS.setdefault(topic, {})[f'{func.__module__}.{func.__qualname__}'] = func
+        return func
+    return register
+
+
+def publish(topic, payload):
+    """Queue ``payload`` for every handler of ``topic``, as part of the current transaction"""
+    now = timezone.now()
+    OutboxEvent.objects.bulk_create([
+        OutboxEvent(topic=topic, handler=name, payload=payload, available_at=now)
+        for name in HANDLERS.get(topic, {})
+    ])
+
+
+def backoff(attempts):
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def due_events(now):
+    return OutboxEvent.objects.filter(status='pending', available_at__lte=now).filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+    )
+
+
+def claim(worker, batch_size, lease=LEASE):
+    """Lease up to ``batch_size`` due events for ``worker`` and return them"""
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:12]}'
+    candidates = due_events(now).order_by('available_at', 'id').values_list('id', flat=True)[:batch_size]
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = list(candidates.select_for_update(skip_locked=True))
+        # Elsewhere the candidates stay a subquery, so the claim is one statement
+        claimed = due_events(now).filter(id__in=candidates).update(locked_by=token, locked_until=now + lease)
+    if not claimed:
+        return []
+    return list(OutboxEvent.objects.filter(status='pending', locked_by=token))
+
+
+def run(event):
+    """Run one event's handler in a pool thread; returns an error message or None"""
+    try:
+        func = HANDLERS.get(event.topic, {}).get(event.handler)
+        if func is None:
+            return f'No handler {event.handler} is registered for {event.topic}'
+        func(event.payload)
+        return None
+    except Exception:
+        logger.exception('Outbox event %s failed', event.pk)
+        return traceback.format_exc(limit=5)
+    finally:
+        # Pool threads hold their own connections
+        close_old_connections()
+
+
+def record(event, error):
+    """Store the outcome of running ``event``, if the worker still holds its lease"""
+    now = timezone.now()
+    leased = OutboxEvent.objects.filter(pk=event.pk, locked_by=event.locked_by, status='pending')
+    attempts = event.attempts + 1
+    if error is None:
+        leased.update(status='done', attempts=F('attempts') + 1, processed_at=now, locked_until=None, last_error='')
+    elif attempts >= MAX_ATTEMPTS:
+        leased.update(status='failed', attempts=F('attempts') + 1, processed_at=now, locked_until=None, last_error=error)
+    else:
+        leased.update(
+            attempts=F('attempts') + 1,
+            available_at=now + backoff(attempts),
+            locked_until=None,
+            last_error=error
+        )
+
+
+def process_batch(pool, worker, batch_size, lease=LEASE):
+    """Claim and run one batch of events; returns how many were claimed"""
+    events = claim(worker, batch_size, lease)
+    for event, error in zip(events, pool.map(run, events)):
+        record(event, error)
+    return len(events)
+
+
+def retry_failed(topic=None):
+    """Send failed events back to the queue with a fresh set of attempts"""
+    failed = OutboxEvent.objects.filter(status='failed')
+    if topic:
+        failed = failed.filter(topic=topic)
+    return failed.update(status='pending', attempts=0, available_at=timezone.now(), processed_at=None)
@@ -0,0 +1,77 @@
+"""
+Keyset (cursor) pagination shared by the catalog, reviews and order history.
+
+Instead of ``OFFSET``, a keyset page continues from the last row of the
+previous page: ``WHERE (field, id) > (last_value, last_id)``, or ``<`` for
+a descending order, so every page costs one indexed range read however far
+the reader goes. The position is carried in a signed, opaque ``?after=``
+token. Each listing signs its tokens with its own salt, so a token that was
+tampered with or minted for another listing is ignored and the first page
+is served instead.
+"""
+from datetime import datetime
+
+from django.core import signing
+from django.db.models import Q
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset"""
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_token, is_first):
+        self.object_list = object_list
+        self.next_token = next_token
+        self.is_first = is_first
+
+    @property
+    def has_next(self):
+        return self.next_token is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or not self.is_first
+
+
+def encode_token(value, last_id, salt):
+    value = value.isoformat() if isinstance(value, datetime) else str(value)
+    return signing.dumps([value, last_id], salt=salt, compress=True)
+
+
+def decode_token(token, salt, decode=str):
+    """Return the (value, id) a token points at, or None if it is unusable"""
+    try:
+        value, last_id = signing.loads(token, salt=salt)
+        return decode(value), int(last_id)
+    except (signing.BadSignature, ValueError, TypeError, ArithmeticError):
+        return None
+
+
+def keyset_page(queryset, field, descending, salt, after=None, per_page=20, decode=str):
+    """Return the page of ``queryset`` following the ``after`` token
+
+    ``queryset`` must already be ordered on ``(field, id)``, descending when
+    ``descending`` is set. ``decode`` turns the token's string value back
+    into a value of ``field``.
+    """
+    position = decode_token(after, salt, decode) if after else None
+    if position is not None:
+        value, last_id = position
+        lookup = 'lt' if descending else 'gt'
+        queryset = queryset.filter(
+            Q(**{f'{field}__{lookup}': value}) | Q(**{field: value, f'id__{lookup}': last_id})
+        )
+
+    # Fetch one extra row to learn whether another page exists
+    rows = list(queryset[:per_page + 1])
+    next_token = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        next_token = encode_token(getattr(last, field), last.id, salt)
+    return KeysetPage(rows[:per_page], next_token, position is None)
@@ -0,0 +1,316 @@
+"""
+Synthetic catalog, customer and order data at benchmark scale.
+
+Rows are generated in fixed-size chunks, each from its own RNG seeded with
+``(seed, stage, chunk)``, so a given seed produces the same dataset whether
+chunks are generated in this process or by a pool of workers. Generators
+only build plain field dicts; the calling process turns them into model
+instances and writes them with ``bulk_create``. Primary keys are assigned
+up front from the current maximum id, so later stages can reference
+earlier rows without reading them back.
+"""
+import random
+import uuid
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db.models import Max
+
+from accounts.models import UserProfile
+from cart.models import Cart, CartItem
+from orders.models import Order, OrderItem
+from products.models import Category, Product, ProductImage, ProductReview
+
+ADJECTIVES = [
+    'Classic', 'Compact', 'Deluxe', 'Eco', 'Essential', 'Premium', 'Pro', 'Smart',
+    'Ultra', 'Vintage', 'Wireless', 'Portable', 'Organic', 'Modern', 'Rugged', 'Slim',
+]
+NOUNS = [
+    'Backpack', 'Blender', 'Camera', 'Chair', 'Desk Lamp', 'Headphones', 'Jacket',
+    'Kettle', 'Keyboard', 'Mug', 'Notebook', 'Running Shoes', 'Speaker', 'Sunglasses',
+    'Tent', 'T-Shirt', 'Watch', 'Water Bottle', 'Yoga Mat', 'Dog Bed', 'Cat Tree',
+]
+DEPARTMENTS = [
+    'Electronics', 'Clothing', 'Books', 'Home', 'Garden', 'Sports', 'Toys', 'Pets',
+    'Kitchen', 'Outdoors', 'Beauty', 'Office',
+]
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Smith', 'Johnson', 'Lee', 'Brown', 'Garcia', 'Miller', 'Davis', 'Wilson', 'Moore', 'Clark']
+CITIES = [('Austin', 'TX'), ('Denver', 'CO'), ('Portland', 'OR'), ('Boston', 'MA'), ('Chicago', 'IL')]
+COMMENTS = [
+    'Exactly as described.', 'Good value for the price.', 'Stopped working after a month.',
+    'Would buy again.', 'Shipping was slow but the product is great.', 'Not what I expected.',
+]
+ORDER_STATUSES = [('delivered', 60), ('shipped', 15), ('processing', 10), ('pending', 10), ('cancelled', 5)]
+
+# Timestamps are spread over this period before the run started
+HISTORY = timedelta(days=730)
+
+STAGES = ['categories', 'users', 'products', 'carts', 'orders']
+
+
+def scale_counts(products):
+    """Row counts for every stage, derived from the number of products"""
+    users = max(10, products // 5)
+    return {
+        'categories': max(5, products // 1000),
+        'users': users,
+        'products': products,
+        'carts': users // 4,
+        'orders': users * 2,
+    }
+
+
+def next_ids():
+    """The first free primary key of every generated model"""
+    models = [Category, User, Product, ProductImage, ProductReview, Cart, CartItem, Order, OrderItem]
+    return {
+        model._meta.label: (model.objects.aggregate(top=Max('pk'))['top'] or 0) + 1
+        for model in models
+    }
+
+
+def product_price(product_id):
+    """A stable price per product, so orders can be priced without a lookup"""
+    return Decimal((product_id * 2654435761) % 49900 + 100) / 100
+
+
+@contextmanager
+def explicit_timestamps():
+    """Let generated rows keep their own created_at/updated_at values"""
+    fields = [
+        field
+        for model in (Category, Product, ProductImage, ProductReview, UserProfile,
+                      Cart, CartItem, Order, OrderItem)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def generate_chunk(task):
+    """Generate rows ``start..stop`` of one stage as ``{model label: [fields]}``"""
+    stage, start, stop, plan = task
+    rng = random.Random(f"{plan['seed']}:{stage}:{start}")
+    rows = {}
+    GENERATORS[stage](rng, start, stop, plan, rows)
+    return rows
+
+
+def _past(rng, plan, span=HISTORY):
+    return plan['now'] - timedelta(seconds=rng.randrange(int(span.total_seconds())))
+
+
+def _person(rng):
+    city, state = rng.choice(CITIES)
+    return {
+        'first_name': rng.choice(FIRST_NAMES),
+        'last_name': rng.choice(LAST_NAMES),
+        'city': city,
+        'state': state,
+    }
+
+
+def _categories(rng, start, stop, plan, rows):
+    base = plan['ids'][Category._meta.label]
+    for i in range(start, stop):
+        category_id = base + i
+        department = DEPARTMENTS[i % len(DEPARTMENTS)]
+        created = _past(rng, plan)
+        rows.setdefault(Category._meta.label, []).append({
+            'id': category_id,
+            'name': f'{department} {category_id}',
+            'slug': f'{department.lower()}-{category_id}',
+            'description': f'Sample {department.lower()} products',
+            'created_at': created,
+            'updated_at': created,
+        })
+
+
+def _users(rng, start, stop, plan, rows):
+    base = plan['ids'][User._meta.label]
+    for i in range(start, stop):
+        user_id = base + i
+        person = _person(rng)
+        joined = _past(rng, plan)
+        rows.setdefault(User._meta.label, []).append({
+            'id': user_id,
+            'username': f'sample-user-{user_id}',
+            'email': f'sample-user-{user_id}@example.com',
+            'first_name': person['first_name'],
+            'last_name': person['last_name'],
+            'password': plan['password'],
+            'date_joined': joined,
+        })
+        rows.setdefault(UserProfile._meta.label, []).append({
+            'user_id': user_id,
+            'city': person['city'],
+            'state': person['state'],
+            'created_at': joined,
+            'updated_at': joined,
+        })
+
+
+def _products(rng, start, stop, plan, rows):
+    counts, ids = plan['counts'], plan['ids']
+    first_user = ids[User._meta.label]
+    image_id = ids[ProductImage._meta.label] + start
+    review_id = ids[ProductReview._meta.label] + start * 3
+    statuses = [key for key, label in Product.STOCK_STATUS_CHOICES]
+
+    for i in range(start, stop):
+        product_id = ids[Product._meta.label] + i
+        created = _past(rng, plan)
+        product = {
+            'id': product_id,
+            'name': f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {product_id}',
+            'slug': f'sample-product-{product_id}',
+            'description': 'Sample product generated for benchmarking.',
+            'price': product_price(product_id),
+            'category_id': ids[Category._meta.label] + rng.randrange(counts['categories']),
+            'stock': rng.randrange(0, 200),
+            'stock_status': rng.choices(statuses, weights=[85, 10, 5][:len(statuses)])[0],
+            'is_active': rng.random() < 0.97,
+            'featured': rng.random() < 0.01,
+            'created_at': created,
+            'updated_at': created,
+        }
+
+        if rng.random() < 0.5:
+            rows.setdefault(ProductImage._meta.label, []).append({
+                'id': image_id,
+                'product_id': product_id,
+                'image': f'products/gallery/sample-{product_id}.jpg',
+                'is_primary': True,
+                'created_at': created,
+            })
+            image_id += 1
+
+        # Stored rating aggregates match the generated reviews
+        reviewers = rng.sample(range(counts['users']), min(counts['users'], rng.randrange(0, 4)))
+        product.update({f'rating_{stars}': 0 for stars in range(1, 6)})
+        for reviewer in reviewers:
+            rating = rng.choices(range(1, 6), weights=[5, 5, 15, 35, 40])[0]
+            reviewed = created + (plan['now'] - created) * rng.random()
+            rows.setdefault(ProductReview._meta.label, []).append({
+                'id': review_id,
+                'product_id': product_id,
+                'user_id': first_user + reviewer,
+                'rating': rating,
+                'comment': rng.choice(COMMENTS),
+                'created_at': reviewed,
+                'updated_at': reviewed,
+            })
+            review_id += 1
+            product[f'rating_{rating}'] += 1
+        ratings = [product[f'rating_{stars}'] * stars for stars in range(1, 6)]
+        product['rating_count'] = len(reviewers)
+        product['rating_sum'] = sum(ratings)
+        product['rating_average'] = sum(ratings) / len(reviewers) if reviewers else 0
+        rows.setdefault(Product._meta.label, []).append(product)
+
+
+def _carts(rng, start, stop, plan, rows):
+    counts, ids = plan['counts'], plan['ids']
+    item_id = ids[CartItem._meta.label] + start * 5
+    for i in range(start, stop):
+        cart_id = ids[Cart._meta.label] + i
+        updated = _past(rng, plan, timedelta(days=60))
+        cart = {
+            'id': cart_id,
+            'user_id': ids[User._meta.label] + i,
+            'item_count': 0,
+            'subtotal': Decimal('0.00'),
+            'created_at': updated,
+            'updated_at': updated,
+        }
+        for product in rng.sample(range(counts['products']), min(counts['products'], rng.randrange(1, 6))):
+            product_id = ids[Product._meta.label] + product
+            quantity = rng.randrange(1, 4)
+            rows.setdefault(CartItem._meta.label, []).append({
+                'id': item_id,
+                'cart_id': cart_id,
+                'product_id': product_id,
+                'quantity': quantity,
+                'created_at': updated,
+                'updated_at': updated,
+            })
+            item_id += 1
+            cart['item_count'] += quantity
+            cart['subtotal'] += product_price(product_id) * quantity
+        rows.setdefault(Cart._meta.label, []).append(cart)
+
+
+def _orders(rng, start, stop, plan, rows):
+    counts, ids = plan['counts'], plan['ids']
+    item_id = ids[OrderItem._meta.label] + start * 5
+    statuses, weights = zip(*ORDER_STATUSES)
+    for i in range(start, stop):
+        order_id = ids[Order._meta.label] + i
+        user_id = ids[User._meta.label] + rng.randrange(counts['users'])
+        created = _past(rng, plan)
+        status = rng.choices(statuses, weights=weights)[0]
+        person = _person(rng)
+
+        total = Decimal('0.00')
+        products = rng.sample(range(counts['products']), min(counts['products'], rng.randrange(1, 6)))
+        for product in products:
+            product_id = ids[Product._meta.label] + product
+            quantity = rng.randrange(1, 4)
+            total += product_price(product_id) * quantity
+            rows.setdefault(OrderItem._meta.label, []).append({
+                'id': item_id,
+                'order_id': order_id,
+                'product_id': product_id,
+                'quantity': quantity,
+                'price': product_price(product_id),
+                'created_at': created,
+            })
+            item_id += 1
+
+        shipped = created + timedelta(days=1) if status in ('shipped', 'delivered') else None
+        delivered = created + timedelta(days=4) if status == 'delivered' else None
+        rows.setdefault(Order._meta.label, []).append({
+            'id': order_id,
+            'order_id': uuid.UUID(int=rng.getrandbits(128), version=4),
+            'user_id': user_id,
+            'first_name': person['first_name'],
+            'last_name': person['last_name'],
+            'email': f'sample-user-{user_id}@example.com',
+            'phone': f'555-{rng.randrange(10000):04d}',
+            'address_line_1': f'{rng.randrange(1, 9999)} Main St',
+            'city': person['city'],
+            'state': person['state'],
+            'postal_code': f'{rng.randrange(10000, 99999)}',
+            'total_amount': total,
+            'status': status,
+            'payment_status': 'refunded' if status == 'cancelled' else 'completed',
+            'payment_method': 'card',
+            'created_at': created,
+            'updated_at': delivered or shipped or created,
+            'shipped_at': shipped,
+            'delivered_at': delivered,
+        })
+
+
+GENERATORS = {
+    'categories': _categories,
+    'users': _users,
+    'products': _products,
+    'carts': _carts,
+    'orders': _orders,
+}
+
+# Parents are written before children within a chunk
+WRITE_ORDER = [
+    Category, User, UserProfile, Product, ProductImage, ProductReview, Cart, CartItem, Order, OrderItem,
+]
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from products.models import Category, Product
+from . import homepage
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_homepage_for_product(sender, instance, **kwargs):
+    # Only featured products, or ones the cached homepage still shows, matter
+    if instance.featured or instance.pk in homepage.shown_product_ids():
+        homepage.invalidate()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_homepage_for_category(sender, instance, **kwargs):
+    homepage.invalidate()
@@ -1,3 +1,84 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
+
 from django.test import TestCase
+from django.utils import timezone
+
+from . import outbox
+from .models import OutboxEvent
+
+TOPIC = 'test.event'
+
+
+def fail(payload):
+    raise RuntimeError('mail server down')
+
+
+def succeed(payload):
+    pass
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.pool = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.pool.shutdown)
+
+    def event(self, func, **fields):
+        handlers = mock.patch.dict(outbox.HANDLERS, {TOPIC: {func.__name__: func}})
+        handlers.start()
+        self.addCleanup(handlers.stop)
+        return OutboxEvent.objects.create(topic=TOPIC, handler=func.__name__, available_at=timezone.now(), **fields)
+
+    def test_success_marks_the_event_done(self):
+        event = self.event(succeed)
+
+        self.assertEqual(outbox.process_batch(self.pool, 'worker', 10), 1)
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('done', 1))
+        self.assertIsNotNone(event.processed_at)
+
+    def test_failure_is_retried_with_backoff(self):
+        event = self.event(fail)
+
+        with self.assertLogs('core.outbox', 'ERROR'):
+            outbox.process_batch(self.pool, 'worker', 10)
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('pending', 1))
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertIsNone(event.locked_until)
+        self.assertIn('mail server down', event.last_error)
+        # Not due again until the backoff has passed
+        self.assertEqual(outbox.process_batch(self.pool, 'worker', 10), 0)
+
+    def test_last_attempt_fails_the_event(self):
+        event = self.event(fail, attempts=outbox.MAX_ATTEMPTS - 1)
+
+        with self.assertLogs('core.outbox', 'ERROR'):
+            outbox.process_batch(self.pool, 'worker', 10)
+
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('failed', outbox.MAX_ATTEMPTS))
+        self.assertEqual(outbox.retry_failed(), 1)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ('pending', 0))
+
+    def test_expired_lease_is_claimed_again(self):
+        self.event(succeed)
+
+        [first] = outbox.claim('first', 10)
+        self.assertEqual(outbox.claim('second', 10), [])
+
+        OutboxEvent.objects.filter(pk=first.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        [second] = outbox.claim('second', 10)
+        self.assertEqual(second.pk, first.pk)
 
-# Create your tests here.
+        # The worker that lost its lease can no longer record an outcome
+        outbox.record(first, None)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'pending')
+        outbox.record(second, None)
+        second.refresh_from_db()
+        self.assertEqual(second.status, 'done')
@@ -0,0 +1,37 @@
+"""
+Version counters for invalidating cached data.
+
+Cached values are stored under keys that include a counter kept in the
+cache; bumping the counter once a change commits makes every reader miss
+and rebuild. A counter that was evicted restarts from the clock, past every
+version it handed out before, so data cached under an old version is never
+served again.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _seed():
+    return time.time_ns()
+
+
+def current(key):
+    version = cache.get(key)
+    if version is None:
+        seed = _seed()
+        cache.add(key, seed, timeout=None)
+        version = cache.get(key, seed)
+    return version
+
+
+def bump(key):
+    """Move the counter on once the current transaction commits"""
+    def bump_now():
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _seed(), timeout=None)
+
+    transaction.on_commit(bump_now)
@@ -1,19 +1,9 @@
 from django.shortcuts import render
-from products.models import Product, Category
+from .homepage import get_context
 
 
 def home(request):
-    """Homepage view with featured products and categories"""
-    featured_products = Product.objects.filter(
-        featured=True, 
-        is_active=True
-    ).select_related('category')[:8]
-    
-    categories = Category.objects.all()[:6]
-    
-    context = {
-        'featured_products': featured_products,
-        'categories': categories,
-    }
+    """Homepage view with featured products and categories, served from the cache"""
+    context = get_context()
     
     return render(request, 'core/home.html', context)
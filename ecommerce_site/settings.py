@@ -52,6 +52,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'cart.middleware.CartCookieMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -88,6 +89,18 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Catalog caches are invalidated through this cache, so production deployments
+# with several workers should point it at a shared backend (Redis/Memcached).
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,3 +157,29 @@ LOGOUT_REDIRECT_URL = '/'
 
 # Session settings
 SESSION_COOKIE_AGE = 86400  # 1 day
+
+# Catalog listings
+# Serve every listing with keyset (?after=) pagination instead of page numbers.
+# Requests carrying an ?after= token use keyset pagination either way.
+CATALOG_KEYSET_PAGINATION = False
+
+# Upper bounds of the price bands offered as listing facets
+CATALOG_PRICE_BUCKETS = [25, 50, 100, 250, 500]
+
+# Lifetime of cached product detail fragments; edits invalidate them sooner
+PRODUCT_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Visitors' carts live in this signed cookie until they log in
+CART_COOKIE_NAME = 'cart'
+CART_COOKIE_AGE = 60 * 60 * 24 * 30
+
+# Seconds a cart line holds its stock before other shoppers can buy it
+STOCK_HOLD_TTL = 60 * 15
+
+# Order emails are sent by the outbox worker (manage.py run_worker);
+# development prints them to its console
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'orders@ecommerceshop.example.com'
+
+# Products left with this much stock or less after an order are reported to ADMINS
+LOW_STOCK_THRESHOLD = 5
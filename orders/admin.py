@@ -1,3 +1,49 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from .models import Order, OrderItem, OrderTracking
+from .status import TRANSITIONS, transition
 
-# Register your models here.
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    extra = 0
+    raw_id_fields = ['product']
+    readonly_fields = ['product', 'quantity', 'price']
+    can_delete = False
+
+
+class OrderTrackingInline(admin.TabularInline):
+    model = OrderTracking
+    extra = 0
+    readonly_fields = ['status', 'description', 'timestamp']
+    can_delete = False
+
+
+def status_action(status):
+    """An admin action moving the selected orders to ``status``"""
+    def action(modeladmin, request, queryset):
+        result = transition(queryset, status)
+        modeladmin.message_user(request, f'{result.moved} orders marked as {status}.', messages.SUCCESS)
+        if result.skipped:
+            modeladmin.message_user(
+                request,
+                f'{result.skipped} orders were skipped because they are not '
+                f'{" or ".join(TRANSITIONS[status])}.',
+                messages.WARNING
+            )
+
+    action.__name__ = f'mark_{status}'
+    action.short_description = f'Mark selected orders as {status}'
+    return action
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ['order_id', 'user', 'full_name', 'total_amount', 'status', 'payment_status', 'created_at']
+    list_filter = ['status', 'payment_status', 'created_at']
+    search_fields = ['order_id', 'user__username', 'email', 'last_name']
+    ordering = ['-created_at']
+    raw_id_fields = ['user']
+    # Status only changes through the actions, which validate and track it
+    readonly_fields = ['order_id', 'status', 'shipped_at', 'delivered_at', 'created_at', 'updated_at']
+    inlines = [OrderItemInline, OrderTrackingInline]
+    actions = [status_action(status) for status in TRANSITIONS]
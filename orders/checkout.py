@@ -0,0 +1,129 @@
+"""
+Turning a cart into an order.
+
+``place_order`` runs inside one transaction and costs the same handful of
+queries whatever the size of the cart: the lines and their prices are read
+with one join, every product's stock is decremented by a single conditional
+UPDATE, the order items are written with one ``bulk_create`` and the cart is
+emptied with one delete. The stock UPDATE only touches a row while it still
+holds enough units, so when two buyers race for the last units of a SKU the
+database serialises them on the row lock and the loser's UPDATE matches
+fewer rows than it asked for; the whole transaction is then rolled back and
+``OutOfStock`` is raised, leaving the cart as it was. Stock held for other
+carts (see ``cart.reservations``) does not count as available, and the
+buyer's own holds are released once the order exists.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from cart import reservations
+from cart.models import CartItem, StockReservation
+from core import homepage, outbox
+from products.models import Product
+
+from .handlers import ORDER_PLACED
+from .models import Order, OrderItem, OrderTracking
+
+# Order fields filled in from the checkout form
+DETAIL_FIELDS = [
+    'first_name', 'last_name', 'email', 'phone', 'address_line_1', 'address_line_2',
+    'city', 'state', 'postal_code', 'country', 'payment_method',
+]
+
+
+class CheckoutError(Exception):
+    pass
+
+
+class EmptyCart(CheckoutError):
+    def __init__(self):
+        super().__init__('Your cart is empty.')
+
+
+class OutOfStock(CheckoutError):
+    def __init__(self, products):
+        self.products = products
+        names = ', '.join(product.name for product in products)
+        super().__init__(f'Not enough stock left for: {names}')
+
+
+def _take_stock(cart, quantities, now):
+    """Take ``{product_id: quantity}`` out of stock with one UPDATE
+
+    Units held by other carts' unexpired reservations are left alone.
+    Returns False when any product no longer has enough units; the caller
+    then rolls back the rows that were decremented.
+    """
+    taken = Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField()
+    )
+    held = StockReservation.objects.filter(
+        product=OuterRef('pk'), expires_at__gt=now
+    ).exclude(cart=cart).order_by().values('product').annotate(total=Sum('quantity')).values('total')
+    updated = Product.objects.filter(
+        id__in=quantities, is_active=True, stock__gte=Coalesce(Subquery(held), Value(0)) + taken
+    ).update(
+        stock=F('stock') - taken,
+        updated_at=now
+    )
+    stock_changed(quantities)
+    return updated == len(quantities)
+
+
+def stock_changed(product_ids):
+    """Invalidate the cached homepage if it shows any of these products
+
+    Stock moves with QuerySet.update(), which sends no Product signals. The
+    detail page's fragments need nothing: stock is rendered outside them
+    and the product body is keyed on ``updated_at``, which the UPDATE sets.
+    """
+    if homepage.shown_product_ids() & set(product_ids):
+        homepage.invalidate()
+
+
+def place_order(cart, user, details):
+    """Create an order from ``cart`` and empty it
+
+    ``details`` holds the DETAIL_FIELDS for the order. Raises EmptyCart, or
+    OutOfStock naming the products that can no longer be supplied.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Locking the lines makes a second submit of the same cart wait, then find it empty
+        lines = list(
+            CartItem.objects.filter(cart=cart).select_for_update(of=('self',)).select_related('product').only(
+                'quantity', 'product__name', 'product__price'
+            ).order_by('product_id')
+        )
+        if not lines:
+            raise EmptyCart()
+
+        quantities = {line.product_id: line.quantity for line in lines}
+        if _take_stock(cart, quantities, now):
+            order = Order.objects.create(
+                user=user,
+                total_amount=sum(line.quantity * line.product.price for line in lines),
+                **{field: details[field] for field in DETAIL_FIELDS if field in details}
+            )
+            OrderItem.objects.bulk_create([
+                OrderItem(order=order, product_id=line.product_id, quantity=line.quantity, price=line.product.price)
+                for line in lines
+            ])
+            OrderTracking.objects.create(order=order, status='pending', description='Order placed')
+            # Emails and alerts run in the outbox worker once this commits
+            outbox.publish(ORDER_PLACED, {'order_id': order.id})
+            # Emptying the cart also drops its holds
+            cart.clear()
+            return order
+        transaction.set_rollback(True)
+    raise OutOfStock(_short_products(cart))
+
+
+def _short_products(cart):
+    lines = dict(CartItem.objects.filter(cart=cart).values_list('product_id', 'quantity'))
+    available = reservations.available_stock(lines, exclude_cart=cart)
+    short = [product_id for product_id, quantity in lines.items() if available.get(product_id, 0) < quantity]
+    return list(Product.objects.filter(id__in=short).only('name'))
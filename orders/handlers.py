@@ -0,0 +1,43 @@
+"""
+Side effects of placing an order, run by the outbox worker.
+
+``place_order`` publishes an ``order.placed`` event in the checkout
+transaction; each handler here gets its own copy of it and is retried on
+its own, so a failing mail server never resends the stock alert.
+"""
+from django.conf import settings
+from django.core.mail import mail_admins, send_mail
+from django.template.loader import render_to_string
+
+from core import outbox
+from products.models import Product
+from .models import Order
+
+ORDER_PLACED = 'order.placed'
+
+
+@outbox.handler(ORDER_PLACED)
+def send_order_confirmation(payload):
+    order = Order.objects.filter(id=payload['order_id']).first()
+    if order is None:
+        return
+    items = order.items.select_related('product')
+    send_mail(
+        f'Your order {str(order.order_id)[:8]} has been received',
+        render_to_string('orders/email/order_confirmation.txt', {'order': order, 'order_items': items}),
+        None,
+        [order.email]
+    )
+
+
+@outbox.handler(ORDER_PLACED)
+def alert_low_stock(payload):
+    threshold = getattr(settings, 'LOW_STOCK_THRESHOLD', 5)
+    low = list(
+        Product.objects.filter(orderitem__order_id=payload['order_id'], stock__lte=threshold).only('name', 'stock')
+    )
+    if low:
+        mail_admins(
+            f'{len(low)} products are running low on stock',
+            '\n'.join(f'{product.name}: {product.stock} left' for product in low)
+        )
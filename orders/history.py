@@ -0,0 +1,37 @@
+"""
+Keyset-paginated order history.
+
+A customer's orders are read newest first on ``(created_at, id)`` through
+the ``(user, created_at, id)`` index, with each order's item count computed
+by a correlated subquery in the same statement. Every page costs one
+indexed range read, however many orders the customer has placed, and the
+template never touches ``order.items``.
+"""
+from datetime import datetime
+
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from core import pagination
+
+from .models import Order, OrderItem
+
+PER_PAGE = 20
+
+TOKEN_SALT = 'orders.history'
+
+
+def with_item_counts(orders):
+    """Annotate ``total_items`` (units ordered) on an Order queryset"""
+    units = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+        total=Sum('quantity')
+    ).values('total')
+    return orders.annotate(total_items=Coalesce(Subquery(units), Value(0)))
+
+
+def order_page(user, after=None, per_page=PER_PAGE):
+    """The page of a user's orders following the ``after`` token"""
+    orders = with_item_counts(Order.objects.filter(user=user)).order_by('-created_at', '-id')
+    return pagination.keyset_page(
+        orders, 'created_at', True, TOKEN_SALT, after, per_page, datetime.fromisoformat
+    )
@@ -0,0 +1,109 @@
+import csv
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from orders.models import Order
+from orders.status import TRANSITIONS, transition
+
+
+class Command(BaseCommand):
+    help = (
+        'Apply status changes from a warehouse CSV feed of order IDs. Rows give '
+        'an order_id and, unless --status is used, the status to move it to.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV file to read, or '-' for standard input")
+        parser.add_argument(
+            '--status', choices=list(TRANSITIONS),
+            help='Move every listed order to this status instead of reading a status column'
+        )
+        parser.add_argument(
+            '--column', default='order_id',
+            help='Column holding the order ID (default: order_id)'
+        )
+        parser.add_argument(
+            '--description',
+            help='Tracking note written for each order (default: a note per status)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Orders moved per transaction'
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] != '-' and not Path(options['path']).exists():
+            raise CommandError(f"{options['path']} does not exist")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.options = options
+        self.errors = 0
+        self.moved = self.skipped = 0
+        started = time.monotonic()
+
+        # Order IDs waiting to be moved, grouped by target status
+        batches = {status: set() for status in TRANSITIONS}
+        handle = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        try:
+            reader = csv.DictReader(handle)
+            if options['column'] not in (reader.fieldnames or []):
+                raise CommandError(f"The feed has no {options['column']!r} column")
+            for line_number, row in enumerate(reader, start=2):
+                parsed = self.parse_row(row, line_number)
+                if parsed is None:
+                    continue
+                order_id, status = parsed
+                # Apply an earlier move of the same order first, keeping the feed's order
+                for other, pending in batches.items():
+                    if other != status and order_id in pending:
+                        self.flush(other, pending)
+                        batches[other] = set()
+                batches[status].add(order_id)
+                if len(batches[status]) >= options['batch_size']:
+                    self.flush(status, batches[status])
+                    batches[status] = set()
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+        for status, order_ids in batches.items():
+            self.flush(status, order_ids)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Moved {self.moved} orders in {elapsed:.1f}s; {self.skipped} were unknown or '
+                f'not in a status that allows the move, {self.errors} rows skipped'
+            )
+        )
+
+    def skip(self, line_number, message):
+        self.errors += 1
+        if self.errors <= 20:
+            self.stderr.write(f'Row {line_number}: {message}')
+
+    def parse_row(self, row, line_number):
+        try:
+            order_id = uuid.UUID((row.get(self.options['column']) or '').strip())
+        except ValueError:
+            self.skip(line_number, f"invalid order ID {row.get(self.options['column'])!r}")
+            return None
+        status = self.options['status'] or (row.get('status') or '').strip().lower()
+        if status not in TRANSITIONS:
+            self.skip(line_number, f'invalid status {status!r}')
+            return None
+        return order_id, status
+
+    def flush(self, status, order_ids):
+        if not order_ids:
+            return
+        result = transition(
+            Order.objects.filter(order_id__in=order_ids), status, self.options['description']
+        )
+        self.moved += result.moved
+        self.skipped += len(order_ids) - result.moved
+        if self.options['verbosity'] > 1:
+            self.stdout.write(f'{result.moved} of {len(order_ids)} orders moved to {status}')
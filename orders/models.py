@@ -51,6 +51,10 @@ class Order(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # A customer's orders newest first, for keyset-paginated history
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_newest_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id} - {self.user.username}"
@@ -68,7 +72,10 @@ class Order(models.Model):
         return address
 
     def get_total_items(self):
-        return sum(item.quantity for item in self.items.all())
+        # Annotated by orders.history.with_item_counts on listing pages
+        if hasattr(self, 'total_items'):
+            return self.total_items
+        return self.items.aggregate(total=models.Sum('quantity'))['total'] or 0
 
 
 class OrderItem(models.Model):
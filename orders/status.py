@@ -0,0 +1,106 @@
+"""
+Order status transitions.
+
+``TRANSITIONS`` lists the statuses each status may be reached from.
+``transition`` moves any number of orders in one transaction: the orders
+that may make the move are locked and read with one SELECT, moved with one
+``UPDATE ... WHERE status IN (...)`` that also stamps ``shipped_at`` or
+``delivered_at``, and given their ``OrderTracking`` rows with one
+``bulk_create``. Cancelling also returns the orders' units to stock with
+one UPDATE, summed per product. Orders whose current status does not allow
+the move are left alone and reported as skipped, so re-running a warehouse
+feed is harmless and never restocks an order twice.
+"""
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from products.models import Product
+
+from .checkout import stock_changed
+from .models import Order, OrderItem, OrderTracking
+
+TRANSITIONS = {
+    'processing': ['pending'],
+    'shipped': ['pending', 'processing'],
+    'delivered': ['shipped'],
+    'cancelled': ['pending', 'processing'],
+}
+
+# Timestamp field set when an order reaches the status
+TIMESTAMPS = {
+    'shipped': 'shipped_at',
+    'delivered': 'delivered_at',
+}
+
+DESCRIPTIONS = {
+    'processing': 'Your order is being prepared.',
+    'shipped': 'Your order has shipped.',
+    'delivered': 'Your order has been delivered.',
+    'cancelled': 'Your order has been cancelled.',
+}
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+class TransitionResult:
+    def __init__(self, status, order_ids, requested):
+        self.status = status
+        self.order_ids = order_ids
+        self.requested = requested
+
+    @property
+    def moved(self):
+        return len(self.order_ids)
+
+    @property
+    def skipped(self):
+        return self.requested - self.moved
+
+
+def transition(orders, status, description=None):
+    """Move every order in the ``orders`` queryset that may reach ``status`` to it
+
+    Raises InvalidTransition for a status nothing can move to. Returns a
+    TransitionResult; ``requested`` counts the orders in the queryset.
+    """
+    if status not in TRANSITIONS:
+        raise InvalidTransition(f'Orders cannot be moved to {status!r}')
+
+    now = timezone.now()
+    changes = {'status': status, 'updated_at': now}
+    if status in TIMESTAMPS:
+        changes[TIMESTAMPS[status]] = now
+
+    with transaction.atomic():
+        requested = orders.count()
+        movable = orders.filter(status__in=TRANSITIONS[status])
+        order_ids = list(movable.select_for_update().order_by('id').values_list('id', flat=True))
+        if order_ids:
+            Order.objects.filter(id__in=order_ids, status__in=TRANSITIONS[status]).update(**changes)
+            OrderTracking.objects.bulk_create([
+                OrderTracking(order_id=order_id, status=status, description=description or DESCRIPTIONS[status])
+                for order_id in order_ids
+            ])
+            if status == 'cancelled':
+                restock(order_ids, now)
+    return TransitionResult(status, order_ids, requested)
+
+
+def restock(order_ids, now):
+    """Return the units of the given orders to stock with one UPDATE"""
+    quantities = dict(
+        OrderItem.objects.filter(order_id__in=order_ids).order_by().values('product').annotate(
+            total=Sum('quantity')
+        ).values_list('product', 'total')
+    )
+    if not quantities:
+        return
+    returned = Case(
+        *[When(id=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField()
+    )
+    Product.objects.filter(id__in=quantities).update(stock=F('stock') + returned, updated_at=now)
+    stock_changed(quantities)
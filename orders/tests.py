@@ -1,3 +1,127 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
 
-# Create your tests here.
+from cart.models import Cart, StockReservation
+from products.models import Category, Product
+from .checkout import OutOfStock, place_order
+from .models import Order, OrderItem
+from .status import InvalidTransition, transition
+
+DETAILS = {
+    'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada@example.com', 'phone': '555-0100',
+    'address_line_1': '1 Main St', 'city': 'Springfield', 'state': 'IL', 'postal_code': '62701',
+}
+
+
+class CheckoutTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Toys', slug='toys')
+        cls.product = Product.objects.create(
+            name='Ball', slug='ball', description='A ball', price=Decimal('5.00'), category=category, stock=3
+        )
+        cls.buyer = User.objects.create_user('buyer')
+        cls.other = User.objects.create_user('other')
+
+    def cart_with(self, user, quantity):
+        cart = Cart.objects.create(user=user)
+        cart.add_product(self.product, quantity)
+        return cart
+
+    def stock(self):
+        return Product.objects.values_list('stock', flat=True).get(pk=self.product.pk)
+
+    def test_order_takes_stock_and_empties_cart(self):
+        cart = self.cart_with(self.buyer, 2)
+
+        order = place_order(cart, self.buyer, DETAILS)
+
+        self.assertEqual(order.total_amount, Decimal('10.00'))
+        self.assertEqual(list(order.items.values_list('product_id', 'quantity')), [(self.product.pk, 2)])
+        self.assertEqual(self.stock(), 1)
+        self.assertFalse(cart.items.exists())
+        self.assertFalse(StockReservation.objects.filter(cart=cart).exists())
+
+    def test_oversell_is_rejected(self):
+        cart = self.cart_with(self.buyer, 2)
+        # Another channel sold units after the line was added
+        Product.objects.filter(pk=self.product.pk).update(stock=1)
+
+        with self.assertRaises(OutOfStock) as raised:
+            place_order(cart, self.buyer, DETAILS)
+
+        self.assertEqual([product.pk for product in raised.exception.products], [self.product.pk])
+        self.assertEqual(self.stock(), 1)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(cart.items.get().quantity, 2)
+
+    def test_other_carts_holds_are_not_available(self):
+        self.cart_with(self.other, 2)
+        cart = self.cart_with(self.buyer, 1)
+        Product.objects.filter(pk=self.product.pk).update(stock=2)
+
+        with self.assertRaises(OutOfStock):
+            place_order(cart, self.buyer, DETAILS)
+        self.assertEqual(self.stock(), 2)
+
+
+class TransitionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Toys', slug='toys')
+        cls.product = Product.objects.create(
+            name='Ball', slug='ball', description='A ball', price=Decimal('5.00'), category=category, stock=10
+        )
+        cls.user = User.objects.create_user('buyer')
+
+    def order(self, status, quantity=2):
+        order = Order.objects.create(user=self.user, status=status, total_amount=Decimal('10.00'), **DETAILS)
+        OrderItem.objects.create(order=order, product=self.product, quantity=quantity, price=Decimal('5.00'))
+        return order
+
+    def test_illegal_moves_are_skipped(self):
+        pending = self.order('pending')
+        delivered = self.order('delivered')
+
+        result = transition(Order.objects.filter(pk__in=[pending.pk, delivered.pk]), 'delivered')
+
+        self.assertEqual((result.moved, result.skipped), (0, 2))
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'pending')
+        self.assertIsNone(pending.delivered_at)
+        self.assertFalse(pending.tracking.exists())
+
+    def test_unknown_target_status_is_rejected(self):
+        order = self.order('processing')
+
+        with self.assertRaises(InvalidTransition):
+            transition(Order.objects.filter(pk=order.pk), 'pending')
+
+    def test_shipping_stamps_the_order(self):
+        order = self.order('processing')
+
+        result = transition(Order.objects.filter(pk=order.pk), 'shipped')
+
+        self.assertEqual(result.moved, 1)
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'shipped')
+        self.assertIsNotNone(order.shipped_at)
+        self.assertEqual(list(order.tracking.values_list('status', flat=True)), ['shipped'])
+
+    def test_cancelling_restocks_once(self):
+        orders = Order.objects.filter(pk__in=[self.order('pending', 2).pk, self.order('processing', 3).pk])
+
+        self.assertEqual(transition(orders, 'cancelled').moved, 2)
+        self.assertEqual(transition(orders, 'cancelled').moved, 0)
+
+        self.product.refresh_from_db(fields=['stock'])
+        self.assertEqual(self.product.stock, 15)
+
+    def test_shipped_orders_cannot_be_cancelled(self):
+        order = self.order('shipped')
+
+        self.assertEqual(transition(Order.objects.filter(pk=order.pk), 'cancelled').skipped, 1)
+        self.product.refresh_from_db(fields=['stock'])
+        self.assertEqual(self.product.stock, 10)
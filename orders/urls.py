@@ -5,5 +5,7 @@ app_name = 'orders'
 
 urlpatterns = [
     path('', views.order_list, name='order_list'),
+    path('checkout/', views.checkout, name='checkout'),
+    path('export/', views.export_orders, name='export_orders'),
     path('<uuid:order_id>/', views.order_detail, name='order_detail'),
 ]
\ No newline at end of file
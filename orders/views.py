@@ -1,20 +1,87 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404
+from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from .models import Order
+from django.contrib.admin.views.decorators import staff_member_required
+from cart import reservations
+from cart.models import Cart
+from core.exports import export_response
+from .checkout import DETAIL_FIELDS, CheckoutError, place_order
+from .history import order_page
+from .models import Order, OrderItem
+
+REQUIRED_FIELDS = ['first_name', 'last_name', 'email', 'phone', 'address_line_1', 'city', 'state', 'postal_code']
 
 
 @login_required
 def order_list(request):
-    """Display user's orders"""
-    orders = Order.objects.filter(user=request.user).order_by('-created_at')
+    """Display user's orders, newest first, a page at a time"""
+    page = order_page(request.user, request.GET.get('after'))
     
     context = {
-        'orders': orders,
+        'orders': page.object_list,
+        'next_token': page.next_token,
+        'first_page': page.is_first,
     }
     
     return render(request, 'orders/order_list.html', context)
 
 
+@login_required
+def checkout(request):
+    """Collect shipping details and place an order for the user's cart"""
+    cart, created = Cart.objects.get_or_create(user=request.user)
+    if not cart.item_count:
+        messages.info(request, 'Your cart is empty.')
+        return redirect('cart:cart_detail')
+
+    if request.method == 'POST':
+        details = {field: request.POST.get(field, '').strip() for field in DETAIL_FIELDS}
+        missing = [field for field in REQUIRED_FIELDS if not details[field]]
+        if missing:
+            messages.error(request, 'Please fill in all required fields.')
+        else:
+            try:
+                order = place_order(cart, request.user, details)
+            except CheckoutError as exc:
+                messages.error(request, str(exc))
+                return redirect('cart:cart_detail')
+            messages.success(request, 'Thank you! Your order has been placed.')
+            return redirect('orders:order_detail', order_id=order.order_id)
+    else:
+        # Hold the cart's stock while the shopper fills in their details
+        try:
+            reservations.hold_cart(cart)
+        except reservations.InsufficientStock as exc:
+            messages.error(request, str(exc))
+            return redirect('cart:cart_detail')
+
+        # Start from the default address, falling back to the profile
+        user = request.user
+        address = user.addresses.filter(is_default=True).first()
+        source = address or user.profile
+        details = {
+            'first_name': getattr(address, 'first_name', user.first_name),
+            'last_name': getattr(address, 'last_name', user.last_name),
+            'email': user.email,
+            'phone': source.phone or user.profile.phone,
+            'address_line_1': source.address_line_1,
+            'address_line_2': source.address_line_2,
+            'city': source.city,
+            'state': source.state,
+            'postal_code': source.postal_code,
+            'country': source.country or 'USA',
+            'payment_method': 'card',
+        }
+
+    context = {
+        'cart': cart,
+        'cart_items': cart.lines(),
+        'details': details,
+    }
+
+    return render(request, 'orders/checkout.html', context)
+
+
 @login_required
 def order_detail(request, order_id):
     """Display order details"""
@@ -27,3 +94,16 @@ def order_detail(request, order_id):
     }
     
     return render(request, 'orders/order_detail.html', context)
+
+
+@staff_member_required
+def export_orders(request):
+    """Stream one row per order item, with its order's details, as CSV or JSONL"""
+    items = OrderItem.objects.order_by('order_id', 'id')
+    columns = [
+        'order__order_id', 'order__created_at', 'order__user__username',
+        'order__email', 'order__status', 'order__payment_status',
+        'order__total_amount', 'product_id', 'product__slug', 'product__name',
+        'quantity', 'price',
+    ]
+    return export_response(request, items, columns, 'orders')
@@ -24,6 +24,10 @@ class ProductAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     inlines = [ProductImageInline]
     ordering = ['-created_at']
+    readonly_fields = [
+        'rating_count', 'rating_sum', 'rating_average',
+        'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+    ]
 
 
 @admin.register(ProductReview)
@@ -0,0 +1,238 @@
+"""
+Read-only JSON catalog API.
+
+Responses are built from ``values()`` projections limited to the fields
+the client asked for (``?fields=name,price``), never from model instances.
+Every response carries a strong ETag and a Last-Modified date derived from
+``updated_at``. List endpoints compare them against the conditional
+request headers after a ``MAX(updated_at)`` lookup and before running the
+page query, so an unchanged catalog costs one indexed aggregate per poll,
+plus a primary-key read of the ``CatalogDeletion`` row that stands in for
+rows that were deleted.
+Detail endpoints fetch the row once and answer 304 before serializing it.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import CatalogDeletion, Category, Product
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Public field name -> ORM lookup
+PRODUCT_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'name': 'name',
+    'description': 'description',
+    'price': 'price',
+    'image': 'image',
+    'category': 'category__slug',
+    'category_name': 'category__name',
+    'stock': 'stock',
+    'stock_status': 'stock_status',
+    'featured': 'featured',
+    'rating_average': 'rating_average',
+    'rating_count': 'rating_count',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+PRODUCT_LIST_FIELDS = ['id', 'slug', 'name', 'price', 'image', 'category', 'stock_status', 'rating_average']
+
+CATEGORY_FIELDS = {
+    'id': 'id',
+    'slug': 'slug',
+    'name': 'name',
+    'description': 'description',
+    'image': 'image',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+CATEGORY_LIST_FIELDS = ['id', 'slug', 'name', 'image']
+
+
+class InvalidRequest(Exception):
+    pass
+
+
+def note_deletion():
+    """Record, in the deleting transaction, that catalog rows were deleted"""
+    CatalogDeletion.objects.bulk_create(
+        [CatalogDeletion(pk=1, deleted_at=timezone.now())],
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=['deleted_at'],
+    )
+
+
+def last_deletion():
+    return CatalogDeletion.objects.filter(pk=1).values_list('deleted_at', flat=True).first()
+
+
+def error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def selected_fields(request, available, default):
+    requested = request.GET.get('fields')
+    if not requested:
+        return default
+    fields = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise InvalidRequest(f"unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def media_url(name):
+    return settings.MEDIA_URL + name if name else None
+
+
+def project(queryset, fields, available):
+    """Run the ``values()`` projection for the public ``fields``"""
+    lookups = [available[name] for name in fields]
+    for row in queryset.values(*lookups):
+        item = {name: row[available[name]] for name in fields}
+        if 'image' in item:
+            item['image'] = media_url(item['image'])
+        yield item
+
+
+def validators(request, *timestamps):
+    """Strong ETag and Last-Modified date for a response built at ``timestamps``"""
+    last_modified = max((ts for ts in timestamps if ts), default=None)
+    digest = hashlib.md5(request.get_full_path().encode())
+    for ts in timestamps:
+        digest.update(ts.isoformat().encode() if ts else b'-')
+    return f'"{digest.hexdigest()}"', last_modified
+
+
+def conditional(request, etag, last_modified):
+    timestamp = last_modified.timestamp() if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+def respond(data, etag, last_modified):
+    response = JsonResponse(data)
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let clients keep their copy but revalidate on every use
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def page_bounds(request):
+    try:
+        after = int(request.GET.get('after', 0))
+        limit = min(int(request.GET.get('limit', DEFAULT_LIMIT)), MAX_LIMIT)
+    except ValueError:
+        raise InvalidRequest('after and limit must be integers')
+    if limit < 1:
+        raise InvalidRequest('limit must be positive')
+    return after, limit
+
+
+def list_response(request, queryset, fields, available, timestamps):
+    """Keyset-paginate ``queryset`` by id, or answer 304 if nothing changed"""
+    after, limit = page_bounds(request)
+    etag, last_modified = validators(request, *timestamps)
+    not_modified = conditional(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    # Fetch one extra id to know whether there is a next page
+    queryset = queryset.filter(id__gt=after).order_by('id')
+    rows = list(project(queryset[:limit + 1], list(dict.fromkeys(['id'] + fields)), available))
+    next_url = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        params = request.GET.copy()
+        params['after'] = rows[-1]['id']
+        next_url = f'{request.path}?{params.urlencode()}'
+    results = [{name: row[name] for name in fields} for row in rows]
+    return respond({'results': results, 'next': next_url}, etag, last_modified)
+
+
+def product_list(request):
+    try:
+        fields = selected_fields(request, PRODUCT_FIELDS, PRODUCT_LIST_FIELDS)
+        products = Product.objects.filter(is_active=True)
+        if request.GET.get('category'):
+            products = products.filter(category__slug=request.GET['category'])
+
+        # Inactive rows count too: deactivating a product removes it from the list
+        product_changed = Product.objects.aggregate(last=Max('updated_at'))['last']
+        timestamps = [product_changed, last_deletion()]
+        if any(PRODUCT_FIELDS[name].startswith('category__') for name in fields):
+            timestamps.append(Category.objects.aggregate(last=Max('updated_at'))['last'])
+        return list_response(request, products, fields, PRODUCT_FIELDS, timestamps)
+    except InvalidRequest as exc:
+        return error(str(exc))
+
+
+def product_detail(request, slug):
+    try:
+        fields = selected_fields(request, PRODUCT_FIELDS, list(PRODUCT_FIELDS))
+    except InvalidRequest as exc:
+        return error(str(exc))
+
+    lookups = list(dict.fromkeys(
+        [PRODUCT_FIELDS[name] for name in fields] + ['updated_at', 'category__updated_at']
+    ))
+    row = Product.objects.filter(slug=slug, is_active=True).values(*lookups).first()
+    if row is None:
+        return error('not found', status=404)
+
+    etag, last_modified = validators(request, row['updated_at'], row['category__updated_at'])
+    not_modified = conditional(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    product = {name: row[PRODUCT_FIELDS[name]] for name in fields}
+    if 'image' in product:
+        product['image'] = media_url(product['image'])
+    product['url'] = reverse('products:product_detail', args=[slug])
+    return respond(product, etag, last_modified)
+
+
+def category_list(request):
+    try:
+        fields = selected_fields(request, CATEGORY_FIELDS, CATEGORY_LIST_FIELDS)
+        timestamps = [Category.objects.aggregate(last=Max('updated_at'))['last'], last_deletion()]
+        return list_response(request, Category.objects.all(), fields, CATEGORY_FIELDS, timestamps)
+    except InvalidRequest as exc:
+        return error(str(exc))
+
+
+def category_detail(request, slug):
+    try:
+        fields = selected_fields(request, CATEGORY_FIELDS, list(CATEGORY_FIELDS))
+    except InvalidRequest as exc:
+        return error(str(exc))
+
+    lookups = list(dict.fromkeys([CATEGORY_FIELDS[name] for name in fields] + ['updated_at']))
+    row = Category.objects.filter(slug=slug).values(*lookups).first()
+    if row is None:
+        return error('not found', status=404)
+
+    etag, last_modified = validators(request, row['updated_at'])
+    not_modified = conditional(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    category = {name: row[CATEGORY_FIELDS[name]] for name in fields}
+    if 'image' in category:
+        category['image'] = media_url(category['image'])
+    category['url'] = reverse('products:category_detail', args=[slug])
+    return respond(category, etag, last_modified)
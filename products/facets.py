@@ -0,0 +1,152 @@
+"""
+Faceted navigation counts for the product listing.
+
+All three facets (category, price band and stock status) come from one
+grouped query over the listing's base queryset::
+
+    SELECT category_id, <price band>, stock_status, COUNT(*) ... GROUP BY 1, 2, 3
+
+Each facet is then summed in Python from those groups, ignoring the
+facet's own filter so the user can see what switching to another value
+would return. The unsearched groups are cached and dropped whenever a
+product changes, so a plain listing request needs no GROUP BY at all.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Value, When
+
+from .models import Product
+
+BASE_CACHE_KEY = 'products:facets:base'
+BASE_CACHE_TIMEOUT = 60 * 60
+
+DEFAULT_PRICE_BUCKETS = [25, 50, 100, 250, 500]
+
+
+def price_bands():
+    """Return (key, label, low, high) for each configured price band"""
+    bounds = getattr(settings, 'CATALOG_PRICE_BUCKETS', DEFAULT_PRICE_BUCKETS)
+    bounds = [Decimal(str(bound)) for bound in bounds]
+    bands = []
+    low = None
+    for high in bounds + [None]:
+        if low is None:
+            key, label = f'0-{high}', f'Under ${high}'
+        elif high is None:
+            key, label = f'{low}-', f'${low} & above'
+        else:
+            key, label = f'{low}-{high}', f'${low} to ${high}'
+        bands.append((key, label, low, high))
+        low = high
+    return bands
+
+
+def price_band_expression():
+    whens = [
+        When(price__lt=high, then=Value(key))
+        for key, label, low, high in price_bands() if high is not None
+    ]
+    return Case(*whens, default=Value(price_bands()[-1][0]), output_field=CharField())
+
+
+def filter_price_band(products, band_key):
+    for key, label, low, high in price_bands():
+        if key == band_key:
+            if low is not None:
+                products = products.filter(price__gte=low)
+            if high is not None:
+                products = products.filter(price__lt=high)
+            return products
+    return products
+
+
+def grouped_queryset(products):
+    """Count products per (category, price band, stock status) in one query"""
+    return (
+        products.order_by()
+        .annotate(price_band=price_band_expression())
+        .values_list('category_id', 'price_band', 'stock_status')
+        .annotate(count=Count('id'))
+    )
+
+
+def grouped_counts(products):
+    return list(grouped_queryset(products))
+
+
+def base_counts():
+    """Grouped counts for every active product, served from the cache"""
+    groups = cache.get(BASE_CACHE_KEY)
+    if groups is None:
+        groups = grouped_counts(Product.objects.filter(is_active=True))
+        cache.set(BASE_CACHE_KEY, groups, BASE_CACHE_TIMEOUT)
+    return groups
+
+
+def invalidate():
+    transaction.on_commit(lambda: cache.delete(BASE_CACHE_KEY))
+
+
+def build_facets(groups, categories, selected):
+    """Sum grouped counts into the three facets
+
+    ``selected`` maps 'category' (an id), 'price' and 'stock' to the
+    currently applied filter values, or None.
+    """
+    totals = {'category': {}, 'price': {}, 'stock': {}}
+    for category_id, band, status, count in groups:
+        values = {'category': category_id, 'price': band, 'stock': status}
+        for facet, counts in totals.items():
+            # A facet's own filter does not narrow its counts
+            if all(
+                selected[other] in (None, values[other])
+                for other in totals if other != facet
+            ):
+                counts[values[facet]] = counts.get(values[facet], 0) + count
+
+    return {
+        'categories': [
+            {'category': category, 'count': totals['category'].get(category.id, 0)}
+            for category in categories
+        ],
+        'price': [
+            {'key': key, 'label': label, 'count': totals['price'].get(key, 0)}
+            for key, label, low, high in price_bands()
+        ],
+        'stock': [
+            {'key': key, 'label': label, 'count': totals['stock'].get(key, 0)}
+            for key, label in Product.STOCK_STATUS_CHOICES
+        ],
+    }
+
+
+def facet_query(params, name, value):
+    """Querystring for the listing with one filter set to ``value``
+
+    A ``value`` of None clears the filter. Paging restarts from the first
+    page since the result set changes.
+    """
+    params = params.copy()
+    for key in ('page', name):
+        params.pop(key, None)
+    if 'after' in params:
+        params['after'] = ''
+    if value is not None:
+        params[name] = value
+    return params.urlencode()
+
+
+def annotate_queries(facets, params, selected):
+    """Attach a 'query' and 'selected' flag to every facet value"""
+    for entry in facets['categories']:
+        slug = entry['category'].slug
+        entry['selected'] = selected['category'] == entry['category'].id
+        entry['query'] = facet_query(params, 'category', None if entry['selected'] else slug)
+    for facet, name in (('price', 'price'), ('stock', 'stock')):
+        for entry in facets[facet]:
+            entry['selected'] = selected[facet] == entry['key']
+            entry['query'] = facet_query(params, name, None if entry['selected'] else entry['key'])
+    return facets
@@ -0,0 +1,44 @@
+"""
+Versioned fragment caching for product detail pages.
+
+Each product has a version counter in the cache. Template fragments on
+the detail page are keyed on the product id, its ``updated_at`` and that
+counter, so bumping the counter (from Product, ProductImage and
+ProductReview signals) makes the next request render fresh fragments.
+Edits that do not touch ``updated_at``, such as new reviews, still show
+up immediately.
+
+The related products fragment renders other products, so it is also keyed
+on a catalog-wide version that any product change bumps.
+"""
+from django.conf import settings
+
+from core import versions
+
+VERSION_KEY = 'products:detail:version:{}'
+
+CATALOG_VERSION_KEY = 'products:detail:catalog_version'
+
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+
+def fragment_timeout():
+    return getattr(settings, 'PRODUCT_FRAGMENT_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+
+def detail_version(product_id):
+    return versions.current(VERSION_KEY.format(product_id))
+
+
+def catalog_version():
+    return versions.current(CATALOG_VERSION_KEY)
+
+
+def bump_detail_version(product_id):
+    """Invalidate a product's cached fragments once the change commits"""
+    versions.bump(VERSION_KEY.format(product_id))
+
+
+def bump_catalog_version():
+    """Invalidate every fragment that shows other products once the change commits"""
+    versions.bump(CATALOG_VERSION_KEY)
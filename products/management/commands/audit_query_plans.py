@@ -0,0 +1,152 @@
+import random
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from products import facets
+from products.models import Category, Product
+from products.pagination import SORT_ORDERINGS, apply_sort
+from products.search import search_products
+
+# Plan fragments that mean the database reads or sorts more than it returns
+WARNING_PATTERNS = {
+    'sqlite': ['USE TEMP B-TREE'],
+    'postgresql': ['Seq Scan', 'Sort  ('],
+}
+
+# Plans that are flagged by design, with the reason they are acceptable
+EXPECTED = {
+    'product_list: facet counts': 'grouped over every product, but cached between catalog changes',
+    'product_list: search': 'relevance is computed per query, so results are sorted',
+    'product_list: price band': 'a price range cannot also be read in name order',
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the catalog view queries and flag full scans and temporary sorts'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--products', type=int, default=50000,
+            help='Number of synthetic products to plan against (0 uses the existing data)'
+        )
+        parser.add_argument(
+            '--categories', type=int, default=50,
+            help='Number of synthetic categories'
+        )
+        parser.add_argument(
+            '--fail-on-warning', action='store_true',
+            help='Exit with an error when any query plan is flagged'
+        )
+
+    def handle(self, *args, **options):
+        warnings = 0
+        try:
+            # Synthetic rows live only inside this transaction
+            with transaction.atomic():
+                if options['products']:
+                    self.create_synthetic_catalog(options['products'], options['categories'])
+                warnings = self.audit()
+                raise Rollback
+        except Rollback:
+            pass
+
+        if warnings and options['fail_on_warning']:
+            raise CommandError(f'{warnings} query plans flagged')
+        style = self.style.WARNING if warnings else self.style.SUCCESS
+        self.stdout.write(style(f'Audit finished: {warnings} query plans flagged'))
+
+    def create_synthetic_catalog(self, product_count, category_count):
+        self.stdout.write(f'Creating {product_count} synthetic products in {category_count} categories...')
+        rng = random.Random(0)
+        categories = Category.objects.bulk_create([
+            Category(name=f'Audit Category {i}', slug=f'audit-category-{i}')
+            for i in range(category_count)
+        ])
+        statuses = [key for key, label in Product.STOCK_STATUS_CHOICES]
+        batch = []
+        for i in range(product_count):
+            batch.append(Product(
+                name=f'Audit Product {rng.randrange(10 ** 6):06d} {i}',
+                slug=f'audit-product-{i}',
+                description='Synthetic product used for query plan auditing.',
+                price=Decimal(rng.randrange(100, 100000)) / 100,
+                category=rng.choice(categories),
+                stock=rng.randrange(0, 100),
+                stock_status=rng.choice(statuses),
+                is_active=rng.random() < 0.95,
+                featured=rng.random() < 0.02,
+            ))
+            if len(batch) >= 5000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+    def catalog_queries(self):
+        """The queries issued by the catalog views, by name"""
+        active = Product.objects.filter(is_active=True).select_related('category')
+        product = active.order_by('id').first()
+        if product is None:
+            raise CommandError('No active products to audit; run with --products')
+        category = product.category
+
+        queries = {
+            'home: featured products': Product.objects.filter(
+                featured=True, is_active=True
+            ).select_related('category')[:8],
+            'product_detail: product by slug': active.filter(slug=product.slug).order_by(),
+            'product_detail: related products': Product.objects.filter(
+                co_purchased_with__product=product, is_active=True
+            ).order_by('co_purchased_with__rank')[:4],
+            'product_detail: related fallback': Product.objects.filter(
+                category=category, is_active=True
+            ).exclude(id=product.id)[:4],
+            'product_list: facet counts': facets.grouped_queryset(Product.objects.filter(is_active=True)),
+            'product_list: search': apply_sort(search_products(active, 'audit product'), 'relevance')[0][:12],
+            'product_list: price band': apply_sort(
+                facets.filter_price_band(active, facets.price_bands()[2][0]), 'name'
+            )[0][:12],
+        }
+        for sort_by in SORT_ORDERINGS:
+            products, _ = apply_sort(active, sort_by)
+            queries[f'product_list: sort={sort_by}'] = products[:12]
+            queries[f'category_detail: sort={sort_by}'] = products.filter(category=category)[:12]
+
+        # Keyset continuation on the default sort
+        queries['product_list: keyset page'] = apply_sort(active, 'name')[0].filter(
+            Q(name__gt=product.name) | Q(name=product.name, id__gt=product.id)
+        )[:13]
+        return queries
+
+    def audit(self):
+        patterns = WARNING_PATTERNS.get(connection.vendor, [])
+        warnings = 0
+        for name, queryset in self.catalog_queries().items():
+            plan = queryset.explain()
+            flagged = [line for line in plan.splitlines() if any(p in line for p in patterns)]
+            if connection.vendor == 'sqlite':
+                # "SCAN table" without an index is a full table scan
+                flagged += [
+                    line for line in plan.splitlines()
+                    if 'SCAN ' in line and 'USING' not in line and 'products_product_fts' not in line
+                ]
+
+            if flagged and name in EXPECTED:
+                self.stdout.write(f'NOTE {name} ({EXPECTED[name]})')
+            elif flagged:
+                self.stdout.write(self.style.WARNING(f'FLAG {name}'))
+                warnings += 1
+            else:
+                self.stdout.write(self.style.SUCCESS(f'OK   {name}'))
+            for line in plan.splitlines():
+                self.stdout.write(f'       {line}')
+        return warnings
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from products import related
+
+
+class Command(BaseCommand):
+    help = 'Count co-purchased products from new orders and refresh related products'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Discard stored counts and recount the whole order history'
+        )
+        parser.add_argument(
+            '--chunk-orders', type=int, default=related.CHUNK_ORDERS,
+            help='Number of orders counted per transaction'
+        )
+        parser.add_argument(
+            '--top-k', type=int, default=related.TOP_K,
+            help='Number of neighbours kept per product'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Updating co-purchase counts...')
+        processed = related.update_co_purchases(
+            full=options['full'],
+            chunk_orders=options['chunk_orders'],
+            top_k=options['top_k'],
+            stdout=self.stdout
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Done. Counted {processed} new orders')
+        )
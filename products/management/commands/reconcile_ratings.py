@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from products import ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the review aggregates stored on every product'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of products checked per batch'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Reconciling product ratings...')
+        fixed = ratings.reconcile(
+            batch_size=options['batch_size'],
+            stdout=self.stdout if options['verbosity'] > 1 else None
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f'Done. Fixed aggregates on {fixed} products')
+        )
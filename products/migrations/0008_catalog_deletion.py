@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_review_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogDeletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deleted_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.urls import reverse
 from django.contrib.auth.models import User
 
@@ -22,6 +23,13 @@ class Category(models.Model):
         return reverse('products:category_detail', args=[self.slug])
 
 
+# Review aggregates on Product, written only by products.ratings
+RATING_FIELDS = [
+    'rating_count', 'rating_sum', 'rating_average',
+    'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+]
+
+
 class Product(models.Model):
     STOCK_STATUS_CHOICES = [
         ('in_stock', 'In Stock'),
@@ -42,17 +50,52 @@ class Product(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Review aggregates, maintained incrementally by products.ratings
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_average = models.FloatField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
     class Meta:
         ordering = ['-created_at']
+        # One index per listing access path: active products in each sort
+        # order, optionally narrowed to a category. They are partial indexes
+        # on is_active because Django filters booleans as a bare
+        # "WHERE is_active", which SQLite cannot seek on in a leading column.
+        # slug and category are already indexed by their unique constraint
+        # and foreign key.
         indexes = [
-            models.Index(fields=['slug']),
-            models.Index(fields=['category']),
-            models.Index(fields=['featured']),
+            models.Index(fields=['name', 'id'], condition=Q(is_active=True), name='product_active_name_idx'),
+            models.Index(fields=['price', 'id'], condition=Q(is_active=True), name='product_active_price_idx'),
+            models.Index(fields=['-created_at', '-id'], condition=Q(is_active=True), name='product_active_newest_idx'),
+            models.Index(fields=['-rating_average', '-id'], condition=Q(is_active=True), name='product_active_rating_idx'),
+            models.Index(fields=['category', 'name', 'id'], condition=Q(is_active=True), name='product_active_cat_name_idx'),
+            models.Index(fields=['category', 'price', 'id'], condition=Q(is_active=True), name='product_active_cat_price_idx'),
+            models.Index(fields=['category', '-created_at', '-id'], condition=Q(is_active=True), name='product_active_cat_newest_idx'),
+            models.Index(fields=['category', '-rating_average', '-id'], condition=Q(is_active=True), name='product_active_cat_rating_idx'),
+            models.Index(fields=['-created_at'], condition=Q(is_active=True, featured=True), name='product_featured_newest_idx'),
+            # MAX(updated_at) behind the catalog API's ETags
+            models.Index(fields=['updated_at'], name='product_updated_idx'),
         ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        # The rating counters only change through products.ratings' F()
+        # updates; a full save of an existing row would write back the values
+        # loaded earlier and undo reviews posted in between.
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in RATING_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('products:product_detail', args=[self.slug])
 
@@ -60,6 +103,17 @@ class Product(models.Model):
     def is_in_stock(self):
         return self.stock > 0 and self.stock_status == 'in_stock'
 
+    @property
+    def average_rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def rating_histogram(self):
+        """(stars, count) pairs from 5 stars down to 1"""
+        return [(stars, getattr(self, f'rating_{stars}')) for stars in range(5, 0, -1)]
+
 
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='images')
@@ -94,6 +148,62 @@ class ProductReview(models.Model):
     class Meta:
         unique_together = ['product', 'user']
         ordering = ['-created_at']
+        indexes = [
+            # Newest-first keyset pages of one product's reviews
+            models.Index(fields=['product', '-created_at', '-id'], name='review_product_newest_idx'),
+        ]
 
     def __str__(self):
         return f"Review for {self.product.name} by {self.user.username}"
+
+
+class CoPurchaseCount(models.Model):
+    """How many orders contained both products (stored in both directions)"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    other = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['product', 'other']
+        indexes = [
+            models.Index(fields=['product', '-count']),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.other_id}: {self.count}"
+
+
+class RelatedProduct(models.Model):
+    """Top co-purchased neighbours of a product, materialized by products.related"""
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='co_purchased_with')
+    rank = models.PositiveSmallIntegerField()
+    score = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ['product', 'rank']
+        ordering = ['product', 'rank']
+
+    def __str__(self):
+        return f"{self.related} related to {self.product} (#{self.rank})"
+
+
+class CoPurchaseCheckpoint(models.Model):
+    """High-water mark of the orders already counted into CoPurchaseCount"""
+    last_order_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Co-purchases counted up to order {self.last_order_id}"
+
+
+class CatalogDeletion(models.Model):
+    """When products or categories were last deleted (a single row)
+
+    Deleted rows leave no ``updated_at`` behind, so the catalog API folds
+    this time into its list ETags.
+    """
+    deleted_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Catalog rows last deleted at {self.deleted_at}"
@@ -0,0 +1,87 @@
+"""
+Incremental maintenance of the review aggregates stored on Product.
+
+Each review change becomes a single ``UPDATE`` with F() expressions, so
+concurrent reviews never overwrite each other's counts and pages read the
+rating straight from the product row.
+"""
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from .models import Product, ProductReview
+
+STARS = range(1, 6)
+
+
+def apply_delta(product_id, rating, sign):
+    """Add (sign=1) or remove (sign=-1) one review of ``rating`` stars"""
+    new_count = F('rating_count') + sign
+    new_sum = F('rating_sum') + sign * rating
+    Product.objects.filter(pk=product_id).update(
+        rating_count=new_count,
+        rating_sum=new_sum,
+        rating_average=Case(
+            When(rating_count__gt=-sign, then=Cast(new_sum, FloatField()) / new_count),
+            default=Value(0.0),
+            output_field=FloatField()
+        ),
+        # Keep updated_at meaningful for ETags and cache keys built on it
+        updated_at=timezone.now(),
+        **{f'rating_{rating}': F(f'rating_{rating}') + sign}
+    )
+
+
+def aggregate_fields():
+    """Aggregates recomputing every stored rating field from reviews"""
+    fields = {
+        'rating_count': Count('id'),
+        'rating_sum': Sum('rating'),
+    }
+    for stars in STARS:
+        fields[f'rating_{stars}'] = Count('id', filter=Q(rating=stars))
+    return fields
+
+
+def reconcile(batch_size=1000, stdout=None):
+    """Recompute stored aggregates in primary-key batches
+
+    Returns the number of products whose stored values were wrong.
+    """
+    field_names = list(aggregate_fields()) + ['rating_average', 'updated_at']
+    fixed = 0
+    last_id = 0
+    while True:
+        products = list(
+            Product.objects.filter(id__gt=last_id).order_by('id').only('id', *field_names)[:batch_size]
+        )
+        if not products:
+            break
+        last_id = products[-1].id
+
+        actual = {
+            row.pop('product_id'): row
+            for row in ProductReview.objects.filter(
+                product_id__in=[product.id for product in products]
+            ).values('product_id').annotate(**aggregate_fields()).order_by()
+        }
+
+        changed = []
+        for product in products:
+            values = actual.get(product.id, {})
+            expected = {name: values.get(name) or 0 for name in aggregate_fields()}
+            expected['rating_average'] = (
+                expected['rating_sum'] / expected['rating_count'] if expected['rating_count'] else 0
+            )
+            if any(getattr(product, name) != value for name, value in expected.items()):
+                for name, value in expected.items():
+                    setattr(product, name, value)
+                product.updated_at = timezone.now()
+                changed.append(product)
+
+        if changed:
+            Product.objects.bulk_update(changed, field_names)
+            fixed += len(changed)
+        if stdout:
+            stdout.write(f'Checked products up to id {last_id}, fixed {fixed}')
+    return fixed
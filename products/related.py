@@ -0,0 +1,151 @@
+"""
+Co-purchase "related products", materialized from order history.
+
+``update_co_purchases`` walks orders past the stored high-water mark in
+chunks, adds every pair of products bought together to CoPurchaseCount
+and re-ranks the top ``TOP_K`` neighbours of each product it touched into
+RelatedProduct. History is never rescanned unless a full rebuild is
+requested, and product_detail reads its related products with one indexed
+lookup.
+"""
+from collections import Counter
+from datetime import timedelta
+from itertools import combinations, groupby
+
+from django.db import transaction
+from django.utils import timezone
+
+from .fragments import bump_detail_version
+from .models import CoPurchaseCheckpoint, CoPurchaseCount, Product, RelatedProduct
+
+TOP_K = 12
+
+# Orders counted per transaction
+CHUNK_ORDERS = 2000
+
+# Only the first items of very large orders are paired
+MAX_ITEMS_PER_ORDER = 50
+
+# Skip the most recent orders so ones still committing are not jumped over
+SETTLE_TIME = timedelta(minutes=5)
+
+
+def related_products(product, limit=4):
+    """Active co-purchased products, falling back to the same category"""
+    related = list(
+        Product.objects.filter(
+            co_purchased_with__product=product,
+            is_active=True
+        ).order_by('co_purchased_with__rank')[:limit]
+    )
+    if len(related) < limit:
+        related += list(
+            Product.objects.filter(
+                category_id=product.category_id,
+                is_active=True
+            ).exclude(id__in=[product.id] + [p.id for p in related])[:limit - len(related)]
+        )
+    return related
+
+
+def count_pairs(rows):
+    """Count product pairs from (order_id, product_id) rows sorted by order"""
+    pairs = Counter()
+    for order_id, items in groupby(rows, key=lambda row: row[0]):
+        product_ids = sorted({product_id for _, product_id in items})[:MAX_ITEMS_PER_ORDER]
+        for a, b in combinations(product_ids, 2):
+            pairs[(a, b)] += 1
+            pairs[(b, a)] += 1
+    return pairs
+
+
+def add_pair_counts(pairs):
+    """Add counted pairs onto the stored totals with one read and one upsert"""
+    existing = {}
+    product_ids = {a for a, b in pairs}
+    for product_id, other_id, count in CoPurchaseCount.objects.filter(
+        product_id__in=product_ids
+    ).values_list('product_id', 'other_id', 'count').iterator():
+        if (product_id, other_id) in pairs:
+            existing[(product_id, other_id)] = count
+
+    CoPurchaseCount.objects.bulk_create(
+        [
+            CoPurchaseCount(product_id=a, other_id=b, count=existing.get((a, b), 0) + count)
+            for (a, b), count in pairs.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['product', 'other'],
+        update_fields=['count'],
+    )
+
+
+def rerank(product_ids, top_k=TOP_K):
+    """Rewrite the materialized top-K neighbours of the given products"""
+    product_ids = sorted(product_ids)
+    for start in range(0, len(product_ids), 500):
+        chunk = product_ids[start:start + 500]
+        rows = CoPurchaseCount.objects.filter(
+            product_id__in=chunk
+        ).order_by('product_id', '-count', 'other_id').values_list('product_id', 'other_id', 'count')
+
+        neighbours = []
+        for product_id, group in groupby(rows.iterator(), key=lambda row: row[0]):
+            for rank, (_, other_id, count) in enumerate(group, start=1):
+                if rank > top_k:
+                    break
+                neighbours.append(
+                    RelatedProduct(product_id=product_id, related_id=other_id, rank=rank, score=count)
+                )
+
+        RelatedProduct.objects.filter(product_id__in=chunk).delete()
+        RelatedProduct.objects.bulk_create(neighbours, batch_size=1000)
+        for product_id in chunk:
+            bump_detail_version(product_id)
+
+
+def update_co_purchases(full=False, chunk_orders=CHUNK_ORDERS, top_k=TOP_K, stdout=None):
+    """Count orders past the high-water mark and refresh related products
+
+    Returns the number of orders processed.
+    """
+    from orders.models import Order, OrderItem
+
+    checkpoint, _ = CoPurchaseCheckpoint.objects.get_or_create(pk=1)
+    if full:
+        with transaction.atomic():
+            CoPurchaseCount.objects.all().delete()
+            RelatedProduct.objects.all().delete()
+            checkpoint.last_order_id = 0
+            checkpoint.save()
+
+    cutoff = timezone.now() - SETTLE_TIME
+    processed = 0
+    while True:
+        with transaction.atomic():
+            checkpoint = CoPurchaseCheckpoint.objects.select_for_update().get(pk=1)
+            low = checkpoint.last_order_id
+            order_ids = list(
+                Order.objects.filter(id__gt=low, created_at__lt=cutoff)
+                .order_by('id').values_list('id', flat=True)[:chunk_orders]
+            )
+            if not order_ids:
+                break
+            high = order_ids[-1]
+
+            rows = OrderItem.objects.filter(
+                order_id__gt=low, order_id__lte=high
+            ).order_by('order_id').values_list('order_id', 'product_id').iterator(chunk_size=5000)
+            pairs = count_pairs(rows)
+            if pairs:
+                add_pair_counts(pairs)
+                rerank({a for a, b in pairs}, top_k)
+
+            checkpoint.last_order_id = high
+            checkpoint.save()
+
+        processed += len(order_ids)
+        if stdout:
+            stdout.write(f'Counted {processed} orders (up to order {high})')
+    return processed
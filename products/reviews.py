@@ -0,0 +1,27 @@
+"""
+Keyset-paginated product reviews.
+
+Reviews are read newest first on ``(created_at, id)``. The detail page
+renders the first page and the reviews endpoint serves the following ones
+from a signed ``?after=`` token, so every page costs one indexed range
+read no matter how many reviews a product has.
+"""
+from datetime import datetime
+
+from core import pagination
+
+from .models import ProductReview
+
+PER_PAGE = 10
+
+TOKEN_SALT = 'products.reviews'
+
+
+def review_page(product_id, after=None, per_page=PER_PAGE):
+    """The page of a product's reviews following the ``after`` token"""
+    reviews = ProductReview.objects.filter(product_id=product_id).select_related('user').only(
+        'id', 'rating', 'comment', 'created_at', 'user__username'
+    ).order_by('-created_at', '-id')
+    return pagination.keyset_page(
+        reviews, 'created_at', True, TOKEN_SALT, after, per_page, datetime.fromisoformat
+    )
@@ -0,0 +1,232 @@
+"""
+Full-text search index for the product catalog.
+
+Products are indexed into a side table that the database can search without
+scanning ``products_product``:
+
+* SQLite: an FTS5 virtual table whose rowid is the product id.
+* PostgreSQL: a table holding a weighted ``tsvector`` per product with a GIN
+  index on it.
+
+Any other backend (or an SQLite build without FTS5) falls back to the old
+``icontains`` filtering so search keeps working everywhere.
+"""
+import re
+from functools import lru_cache
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+FTS_TABLE = 'products_product_fts'
+PG_TABLE = 'products_product_search'
+
+# Rows written per statement when rebuilding the index
+BATCH_SIZE = 2000
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(query):
+    """Split a raw search string into safe word tokens"""
+    return TOKEN_RE.findall(query.lower())[:10]
+
+
+class IContainsBackend:
+    """Unindexed fallback matching the original search behaviour"""
+
+    def index(self, rows):
+        pass
+
+    def remove(self, product_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def optimize(self):
+        pass
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(category__name__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteFTSBackend(IContainsBackend):
+    """SQLite FTS5 index ranked with bm25 (name > category > description)"""
+
+    rank_sql = f'-bm25({FTS_TABLE}, 10.0, 1.0, 4.0)'
+
+    def index(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR REPLACE INTO {FTS_TABLE} '
+                f'(rowid, name, description, category_name) VALUES (%s, %s, %s, %s)',
+                rows
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(product_id,) for product_id in product_ids]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def optimize(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+    def match_expression(self, query):
+        # Quote every token so user input can never inject FTS5 syntax, and
+        # prefix-match them so partially typed words still hit.
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if match is None:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        # Join the index once: one MATCH feeds both the filter and bm25()
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE} MATCH %s', f'{FTS_TABLE}.rowid = "{table}"."id"'],
+            params=[match]
+        ).annotate(search_rank=RawSQL(self.rank_sql, []))
+
+
+class PostgresSearchBackend(IContainsBackend):
+    """PostgreSQL tsvector index ranked with ts_rank"""
+
+    document_sql = (
+        "setweight(to_tsvector('english', %s), 'A') || "
+        "setweight(to_tsvector('english', %s), 'C') || "
+        "setweight(to_tsvector('english', %s), 'B')"
+    )
+
+    def index(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {PG_TABLE} (product_id, document) VALUES (%s, {self.document_sql}) '
+                f'ON CONFLICT (product_id) DO UPDATE SET document = EXCLUDED.document',
+                rows
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {PG_TABLE} WHERE product_id = ANY(%s)',
+                [list(product_ids)]
+            )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {PG_TABLE}')
+
+    def optimize(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {PG_TABLE}')
+
+    def tsquery(self, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def search(self, queryset, query):
+        tsquery = self.tsquery(query)
+        if tsquery is None:
+            return queryset.none()
+        table = queryset.model._meta.db_table
+        # Join the index once: one tsquery match feeds both the filter and ts_rank()
+        return queryset.extra(
+            tables=[PG_TABLE],
+            where=[
+                f'{PG_TABLE}.product_id = "{table}"."id"',
+                f"{PG_TABLE}.document @@ to_tsquery('english', %s)",
+            ],
+            params=[tsquery]
+        ).annotate(
+            search_rank=RawSQL(f"ts_rank({PG_TABLE}.document, to_tsquery('english', %s))", [tsquery])
+        )
+
+
+@lru_cache(maxsize=None)
+def _backend_for(vendor, alias):
+    if vendor == 'postgresql':
+        return PostgresSearchBackend()
+    if vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names():
+        return SQLiteFTSBackend()
+    return IContainsBackend()
+
+
+def get_backend():
+    """Return the search backend for the default database"""
+    return _backend_for(connection.vendor, connection.alias)
+
+
+def product_rows(queryset):
+    """Yield (id, name, description, category name) tuples to index"""
+    return queryset.values_list(
+        'id', 'name', 'description', 'category__name'
+    ).iterator(chunk_size=BATCH_SIZE)
+
+
+def search_products(queryset, query):
+    """Filter a Product queryset to matches, annotated with ``search_rank``"""
+    return get_backend().search(queryset, query)
+
+
+def index_products(queryset):
+    """(Re)index every product in ``queryset``"""
+    backend = get_backend()
+    batch = []
+    for row in product_rows(queryset):
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            backend.index(batch)
+            batch = []
+    backend.index(batch)
+
+
+def remove_products(product_ids):
+    get_backend().remove(product_ids)
+
+
+def rebuild_index(batch_size=BATCH_SIZE, stdout=None):
+    """Drop and rebuild the whole index, one transaction per batch"""
+    from .models import Product
+
+    backend = get_backend()
+    backend.clear()
+    total = 0
+    batch = []
+    for row in product_rows(Product.objects.order_by('id')):
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with transaction.atomic():
+                backend.index(batch)
+            total += len(batch)
+            batch = []
+            if stdout:
+                stdout.write(f'Indexed {total} products...')
+    with transaction.atomic():
+        backend.index(batch)
+    total += len(batch)
+    backend.optimize()
+    return total
@@ -0,0 +1,92 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from .models import Category, Product, ProductImage, ProductReview
+from . import api, facets, fragments, ratings, search, suggest
+
+
+# Keep the search index in sync with the catalog
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    search.index_products(Product.objects.filter(pk=instance.pk))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def index_category_products(sender, instance, created, **kwargs):
+    if not created:
+        search.index_products(instance.products.all())
+
+
+# Let every worker's suggestion index know what changed
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def publish_product_change(sender, instance, **kwargs):
+    suggest.publish_change(suggest.PRODUCT, instance.pk)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def publish_category_change(sender, instance, **kwargs):
+    suggest.publish_change(suggest.CATEGORY, instance.pk)
+
+
+# Drop the cached facet counts whenever the catalog changes
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def invalidate_facets(sender, **kwargs):
+    facets.invalidate()
+
+
+# Maintain the rating aggregates stored on Product
+@receiver(pre_save, sender=ProductReview)
+def remember_previous_rating(sender, instance, **kwargs):
+    instance._previous_rating = None
+    if instance.pk:
+        instance._previous_rating = ProductReview.objects.filter(
+            pk=instance.pk
+        ).values_list('product_id', 'rating').first()
+
+
+@receiver(post_save, sender=ProductReview)
+def update_rating_on_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous_rating', None)
+    current = (instance.product_id, instance.rating)
+    if previous == current:
+        return
+    if previous:
+        ratings.apply_delta(*previous, sign=-1)
+    ratings.apply_delta(*current, sign=1)
+
+
+@receiver(post_delete, sender=ProductReview)
+def update_rating_on_delete(sender, instance, **kwargs):
+    ratings.apply_delta(instance.product_id, instance.rating, sign=-1)
+
+
+# Invalidate the cached product detail fragments
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_detail(sender, instance, **kwargs):
+    fragments.bump_detail_version(instance.pk)
+    # The product may be shown in other products' related fragments
+    fragments.bump_catalog_version()
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductReview)
+@receiver(post_delete, sender=ProductReview)
+def bump_parent_product_detail(sender, instance, **kwargs):
+    fragments.bump_detail_version(instance.product_id)
+
+
+# Deleted rows leave no updated_at behind for the API's ETags
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+def note_catalog_deletion(sender, **kwargs):
+    api.note_deletion()
@@ -0,0 +1,180 @@
+"""
+In-memory prefix index answering search-as-you-type suggestions.
+
+Every worker process keeps a sorted list of ``(key, kind, id, label, slug)``
+tuples over active product names and category names, and answers prefix
+lookups with ``bisect`` without touching the database.
+
+Catalog changes are published as a version counter in the cache plus one
+change record per version. Before answering, a worker compares its own
+version with the shared one (at most once per ``VERSION_CHECK_INTERVAL``)
+and replays the missed changes with a single ``id__in`` query. If the
+change log has been evicted or the worker is too far behind, it rebuilds
+the whole index instead.
+"""
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'products:suggest:version'
+CHANGE_KEY = 'products:suggest:change:{}'
+CHANGE_TIMEOUT = 60 * 60
+
+# Seconds between checks of the shared version stamp
+VERSION_CHECK_INTERVAL = 1.0
+
+# Replay at most this many changes before falling back to a full rebuild
+MAX_DELTA = 500
+
+# Index a name under each of its first few words
+MAX_WORDS = 4
+
+MIN_QUERY_LENGTH = 2
+
+PRODUCT = 'product'
+CATEGORY = 'category'
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def index_keys(name):
+    """Return the keys a name is reachable by: itself and each word suffix"""
+    words = normalize(name).split(' ')
+    return {' '.join(words[i:]) for i in range(min(len(words), MAX_WORDS))}
+
+
+class PrefixIndex:
+    """Sorted-array prefix index with incremental updates"""
+
+    def __init__(self):
+        self.entries = []
+        self.keys_by_item = {}
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def _add(self, kind, item_id, label, slug):
+        keys = index_keys(label)
+        for key in keys:
+            insort(self.entries, (key, kind, item_id, label, slug))
+        self.keys_by_item[(kind, item_id)] = [(key, kind, item_id, label, slug) for key in keys]
+
+    def _remove(self, kind, item_id):
+        for entry in self.keys_by_item.pop((kind, item_id), []):
+            position = bisect_left(self.entries, entry)
+            if position < len(self.entries) and self.entries[position] == entry:
+                del self.entries[position]
+
+    def rebuild(self, version):
+        from .models import Category, Product
+
+        entries = []
+        keys_by_item = {}
+        sources = [
+            (CATEGORY, Category.objects.values_list('id', 'name', 'slug')),
+            (PRODUCT, Product.objects.filter(is_active=True).values_list('id', 'name', 'slug')),
+        ]
+        for kind, rows in sources:
+            for item_id, label, slug in rows.iterator(chunk_size=5000):
+                item_entries = [(key, kind, item_id, label, slug) for key in index_keys(label)]
+                entries.extend(item_entries)
+                keys_by_item[(kind, item_id)] = item_entries
+        entries.sort()
+
+        # Swap both structures in one go so readers never see a half-built index
+        self.entries, self.keys_by_item = entries, keys_by_item
+        self.version = version
+
+    def apply_changes(self, changes, version):
+        from .models import Category, Product
+
+        sources = {
+            CATEGORY: Category.objects.all(),
+            PRODUCT: Product.objects.filter(is_active=True),
+        }
+        for kind, queryset in sources.items():
+            ids = {item_id for change_kind, item_id in changes if change_kind == kind}
+            if not ids:
+                continue
+            for item_id in ids:
+                self._remove(kind, item_id)
+            for item_id, label, slug in queryset.filter(id__in=ids).values_list('id', 'name', 'slug'):
+                self._add(kind, item_id, label, slug)
+        self.version = version
+
+    def refresh(self):
+        """Bring the index up to the shared version if it has moved"""
+        now = time.monotonic()
+        if self.version is not None and now - self.checked_at < VERSION_CHECK_INTERVAL:
+            return
+        with self.lock:
+            self.checked_at = now
+            current = cache.get(VERSION_KEY, 0)
+            if current == self.version:
+                return
+            if self.version is None or not 0 < current - self.version <= MAX_DELTA:
+                self.rebuild(current)
+                return
+            missed = [CHANGE_KEY.format(v) for v in range(self.version + 1, current + 1)]
+            changes = cache.get_many(missed)
+            if len(changes) != len(missed):
+                self.rebuild(current)
+            else:
+                self.apply_changes(list(changes.values()), current)
+
+    def lookup(self, query, limit=8):
+        prefix = normalize(query)
+        if len(prefix) < MIN_QUERY_LENGTH:
+            return []
+
+        entries = self.entries
+        results = []
+        seen = set()
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and len(results) < limit:
+            key, kind, item_id, label, slug = entries[position]
+            if not key.startswith(prefix):
+                break
+            if (kind, item_id) not in seen:
+                seen.add((kind, item_id))
+                results.append((kind, label, slug))
+            position += 1
+
+        # Categories first, then products by name
+        results.sort(key=lambda result: (result[0] != CATEGORY, result[1].lower()))
+        return results
+
+
+_index = PrefixIndex()
+
+
+def get_suggestions(query, limit=8):
+    _index.refresh()
+    return _index.lookup(query, limit)
+
+
+def publish_change(kind, item_id):
+    """Record a catalog change so every worker's index catches up"""
+    def bump():
+        cache.add(VERSION_KEY, 0, timeout=None)
+        version = cache.incr(VERSION_KEY)
+        cache.set(CHANGE_KEY.format(version), (kind, item_id), CHANGE_TIMEOUT)
+        # This worker already knows about the change, so skip the interval
+        _index.checked_at = 0.0
+
+    transaction.on_commit(bump)
+
+
+def publish_bulk_change():
+    """Make every worker rebuild its index, e.g. after a bulk import"""
+    def bump():
+        cache.add(VERSION_KEY, 0, timeout=None)
+        cache.incr(VERSION_KEY, MAX_DELTA + 1)
+        _index.checked_at = 0.0
+
+    transaction.on_commit(bump)
@@ -1,3 +1,119 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+
+from .models import Category, Product, ProductReview
+
+
+class RatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Toys', slug='toys')
+        cls.product = Product.objects.create(
+            name='Ball', slug='ball', description='A ball', price=Decimal('5.00'), category=category, stock=10
+        )
+        cls.users = [User.objects.create_user(f'reviewer{number}') for number in range(3)]
+
+    def review(self, user, rating):
+        return ProductReview.objects.create(product=self.product, user=user, rating=rating, comment='Fine')
+
+    def stored(self):
+        return Product.objects.values(
+            'rating_count', 'rating_sum', 'rating_average',
+            'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+        ).get(pk=self.product.pk)
+
+    def test_reviews_maintain_the_aggregates(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 2)
+        self.assertEqual(self.stored(), {
+            'rating_count': 2, 'rating_sum': 7, 'rating_average': 3.5,
+            'rating_1': 0, 'rating_2': 1, 'rating_3': 0, 'rating_4': 0, 'rating_5': 1,
+        })
+
+        first.rating = 4
+        first.save()
+        self.assertEqual(self.stored(), {
+            'rating_count': 2, 'rating_sum': 6, 'rating_average': 3.0,
+            'rating_1': 0, 'rating_2': 1, 'rating_3': 0, 'rating_4': 1, 'rating_5': 0,
+        })
+
+        first.delete()
+        self.assertEqual(self.stored(), {
+            'rating_count': 1, 'rating_sum': 2, 'rating_average': 2.0,
+            'rating_1': 0, 'rating_2': 1, 'rating_3': 0, 'rating_4': 0, 'rating_5': 0,
+        })
+
+    def test_last_review_deleted_resets_the_average(self):
+        self.review(self.users[0], 3).delete()
+
+        stored = self.stored()
+        self.assertEqual((stored['rating_count'], stored['rating_sum'], stored['rating_average']), (0, 0, 0.0))
+
+    def test_saving_a_stale_product_keeps_the_counters(self):
+        stale = Product.objects.get(pk=self.product.pk)
+        self.review(self.users[0], 5)
+        self.review(self.users[1], 4)
+
+        stale.price = Decimal('6.00')
+        stale.save()
+
+        stored = self.stored()
+        self.assertEqual((stored['rating_count'], stored['rating_sum'], stored['rating_5']), (2, 9, 1))
+        self.assertEqual(Product.objects.values_list('price', flat=True).get(pk=self.product.pk), Decimal('6.00'))
+
+
+class CatalogApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Toys', slug='toys')
+        cls.ball = Product.objects.create(
+            name='Ball', slug='ball', description='A ball', price=Decimal('5.00'), category=category, stock=10
+        )
+        cls.kite = Product.objects.create(
+            name='Kite', slug='kite', description='A kite', price=Decimal('12.50'), category=category, stock=10
+        )
+
+    def etag(self):
+        response = self.client.get(reverse('products:api_product_list'))
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_matching_etag_answers_not_modified(self):
+        etag = self.etag()
+
+        response = self.client.get(reverse('products:api_product_list'), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_update_changes_the_etag(self):
+        etag = self.etag()
+
+        self.ball.price = Decimal('6.00')
+        self.ball.save()
+
+        response = self.client.get(reverse('products:api_product_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_delete_changes_the_etag(self):
+        etag = self.etag()
+
+        # Not the most recently updated row, so only the deletion watermark moves
+        self.ball.delete()
+
+        response = self.client.get(reverse('products:api_product_list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([row['slug'] for row in response.json()['results']], ['kite'])
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('products:api_product_list'), {'fields': 'name,secret'})
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'unknown fields: secret'})
+        detail = reverse('products:api_product_detail', args=['ball'])
+        self.assertEqual(self.client.get(detail, {'fields': 'secret'}).status_code, 400)
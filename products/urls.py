@@ -1,10 +1,17 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'products'
 
 urlpatterns = [
     path('', views.product_list, name='product_list'),
+    path('api/products/', api.product_list, name='api_product_list'),
+    path('api/products/<slug:slug>/', api.product_detail, name='api_product_detail'),
+    path('api/categories/', api.category_list, name='api_category_list'),
+    path('api/categories/<slug:slug>/', api.category_detail, name='api_category_detail'),
+    path('export/', views.export_products, name='export_products'),
+    path('suggest/', views.suggest, name='suggest'),
     path('product/<slug:slug>/', views.product_detail, name='product_detail'),
+    path('product/<slug:slug>/reviews/', views.product_reviews, name='product_reviews'),
     path('category/<slug:slug>/', views.category_detail, name='category_detail'),
 ]
\ No newline at end of file
@@ -1,7 +1,18 @@
 from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator
-from django.db.models import Q, Avg
-from .models import Product, Category, ProductReview
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils.http import urlencode
+from django.utils.functional import SimpleLazyObject
+from .models import Product, Category
+from .search import search_products
+from . import facets
+from .related import related_products as related_products_for
+from .fragments import catalog_version, detail_version, fragment_timeout
+from .pagination import apply_sort, paginate_products
+from .reviews import review_page
+from .suggest import get_suggestions, CATEGORY
+from core.exports import export_response
 
 
 def product_list(request):
@@ -12,62 +23,87 @@ def product_list(request):
     # Search functionality
     search_query = request.GET.get('search', '')
     if search_query:
-        products = products.filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(category__name__icontains=search_query)
-        )
+        products = search_products(products, search_query)
+    
+    # Facet counts ignore the facet filters below, so keep the base listing
+    facet_products = products
     
     # Category filtering
+    category = None
     category_slug = request.GET.get('category')
     if category_slug:
         category = get_object_or_404(Category, slug=category_slug)
         products = products.filter(category=category)
     
-    # Sorting
-    sort_by = request.GET.get('sort', 'name')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'newest':
-        products = products.order_by('-created_at')
-    else:
-        products = products.order_by('name')
+    # Price band and availability filtering
+    price_band = request.GET.get('price')
+    if price_band not in {key for key, label, low, high in facets.price_bands()}:
+        price_band = None
+    if price_band:
+        products = facets.filter_price_band(products, price_band)
     
-    # Pagination
-    paginator = Paginator(products, 12)  # Show 12 products per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    stock_status = request.GET.get('stock')
+    if stock_status not in dict(Product.STOCK_STATUS_CHOICES):
+        stock_status = None
+    if stock_status:
+        products = products.filter(stock_status=stock_status)
+    
+    # Facet counts: cached for the plain listing, one grouped query for searches
+    groups = facets.grouped_counts(facet_products) if search_query else facets.base_counts()
+    selected = {
+        'category': category.id if category else None,
+        'price': price_band,
+        'stock': stock_status,
+    }
+    facet_counts = facets.annotate_queries(
+        facets.build_facets(groups, categories, selected),
+        request.GET,
+        selected
+    )
+    filter_params = request.GET.copy()
+    for key in ('sort', 'page', 'after'):
+        filter_params.pop(key, None)
+    
+    # Sorting (search results default to relevance)
+    sort_by = request.GET.get('sort', 'relevance' if search_query else 'name')
+    products, sort_by = apply_sort(products, sort_by)
+    
+    # Pagination (page numbers, or keyset when opted into)
+    page_obj = paginate_products(request, products, sort_by)
     
     context = {
         'page_obj': page_obj,
         'categories': categories,
+        'facets': facet_counts,
         'search_query': search_query,
         'current_category': category_slug,
+        'current_price': price_band,
+        'current_stock': stock_status,
         'current_sort': sort_by,
+        'filter_query': filter_params.urlencode(),
     }
     
     return render(request, 'products/product_list.html', context)
 
 
 def product_detail(request, slug):
-    """Product detail view with reviews and related products"""
+    """Product detail view with reviews and related products
+
+    Everything except the product row is loaded lazily, so fragments served
+    from the cache cost no queries.
+    """
     product = get_object_or_404(
         Product.objects.select_related('category'),
         slug=slug,
         is_active=True
     )
     
-    # Get product reviews with ratings
-    reviews = ProductReview.objects.filter(product=product).select_related('user')
-    average_rating = reviews.aggregate(avg_rating=Avg('rating'))['avg_rating']
+    # First page of reviews; the rating summary is stored on the product
+    reviews = SimpleLazyObject(lambda: review_page(product.id))
+    average_rating = product.average_rating
     
-    # Get related products from the same category
-    related_products = Product.objects.filter(
-        category=product.category,
-        is_active=True
-    ).exclude(id=product.id)[:4]
+    # Get products frequently bought together with this one
+    related_products = SimpleLazyObject(lambda: related_products_for(product))
     
     # Get product images
     product_images = product.images.all()
@@ -78,11 +114,39 @@ def product_detail(request, slug):
         'average_rating': average_rating,
         'related_products': related_products,
         'product_images': product_images,
+        'detail_version': detail_version(product.id),
+        'catalog_version': catalog_version(),
+        'fragment_timeout': fragment_timeout(),
     }
     
     return render(request, 'products/product_detail.html', context)
 
 
+def product_reviews(request, slug):
+    """Further pages of a product's reviews, continuing from ``?after=``"""
+    product_id = Product.objects.filter(slug=slug, is_active=True).values_list('id', flat=True).first()
+    if product_id is None:
+        return JsonResponse({'error': 'not found'}, status=404)
+
+    page = review_page(product_id, request.GET.get('after'))
+    next_url = None
+    if page.next_token:
+        next_url = f"{request.path}?{urlencode({'after': page.next_token})}"
+
+    return JsonResponse({
+        'reviews': [
+            {
+                'username': review.user.username,
+                'rating': review.rating,
+                'comment': review.comment,
+                'created_at': review.created_at,
+            }
+            for review in page
+        ],
+        'next': next_url,
+    })
+
+
 def category_detail(request, slug):
     """Category detail view showing products in a specific category"""
     category = get_object_or_404(Category, slug=slug)
@@ -93,19 +157,10 @@ def category_detail(request, slug):
     
     # Sorting
     sort_by = request.GET.get('sort', 'name')
-    if sort_by == 'price_low':
-        products = products.order_by('price')
-    elif sort_by == 'price_high':
-        products = products.order_by('-price')
-    elif sort_by == 'newest':
-        products = products.order_by('-created_at')
-    else:
-        products = products.order_by('name')
+    products, sort_by = apply_sort(products, sort_by)
     
     # Pagination
-    paginator = Paginator(products, 12)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = paginate_products(request, products, sort_by)
     
     context = {
         'category': category,
@@ -114,3 +169,33 @@ def category_detail(request, slug):
     }
     
     return render(request, 'products/category_detail.html', context)
+
+
+def suggest(request):
+    """Search-as-you-type suggestions served from the in-memory prefix index"""
+    query = request.GET.get('q', '')
+    suggestions = []
+    for kind, label, slug in get_suggestions(query):
+        url_name = 'products:category_detail' if kind == CATEGORY else 'products:product_detail'
+        suggestions.append({
+            'type': kind,
+            'label': label,
+            'url': reverse(url_name, args=[slug]),
+        })
+    
+    return JsonResponse({
+        'query': query,
+        'suggestions': suggestions,
+    })
+
+
+@staff_member_required
+def export_products(request):
+    """Stream every product with its category and stock as CSV or JSONL"""
+    products = Product.objects.order_by('id')
+    columns = [
+        'id', 'slug', 'name', 'category__slug', 'category__name', 'price',
+        'stock', 'stock_status', 'is_active', 'featured', 'rating_count',
+        'rating_average', 'created_at', 'updated_at',
+    ]
+    return export_response(request, products, columns, 'products')
@@ -85,18 +85,63 @@ document.addEventListener('DOMContentLoaded', function() {
     const searchInput = document.querySelector('input[name="search"]');
     if (searchInput) {
         let searchTimeout;
+        let suggestController;
+        
+        const suggestBox = document.createElement('div');
+        suggestBox.className = 'search-suggestions list-group';
+        searchInput.parentElement.appendChild(suggestBox);
+        
+        const hideSuggestions = () => {
+            suggestBox.innerHTML = '';
+            suggestBox.style.display = 'none';
+        };
         
         searchInput.addEventListener('input', function() {
             clearTimeout(searchTimeout);
             const query = this.value.trim();
             
-            if (query.length >= 2) {
-                searchTimeout = setTimeout(() => {
-                    // Auto-suggest functionality could be implemented here
-                    console.log('Searching for:', query);
-                }, 300);
+            if (query.length < 2) {
+                hideSuggestions();
+                return;
             }
+            
+            searchTimeout = setTimeout(() => {
+                // Drop the previous request so late answers never overwrite newer ones
+                if (suggestController) {
+                    suggestController.abort();
+                }
+                suggestController = new AbortController();
+                
+                fetch(`/products/suggest/?q=${encodeURIComponent(query)}`, {
+                    signal: suggestController.signal
+                })
+                .then(response => response.json())
+                .then(data => {
+                    suggestBox.innerHTML = '';
+                    data.suggestions.forEach(suggestion => {
+                        const link = document.createElement('a');
+                        link.className = 'list-group-item list-group-item-action';
+                        link.href = suggestion.url;
+                        link.textContent = suggestion.label;
+                        if (suggestion.type === 'category') {
+                            const badge = document.createElement('span');
+                            badge.className = 'badge bg-secondary ms-2';
+                            badge.textContent = 'Category';
+                            link.appendChild(badge);
+                        }
+                        suggestBox.appendChild(link);
+                    });
+                    suggestBox.style.display = data.suggestions.length ? 'block' : 'none';
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Error:', error);
+                    }
+                });
+            }, 150);
         });
+        
+        searchInput.addEventListener('blur', () => setTimeout(hideSuggestions, 200));
     }
 
     // Cart operations
@@ -303,6 +348,65 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     });
 
+    // Load further pages of product reviews
+    const loadMoreReviews = document.querySelector('.load-more-reviews');
+    if (loadMoreReviews) {
+        const reviewList = document.querySelector('.review-list');
+
+        loadMoreReviews.addEventListener('click', function() {
+            this.disabled = true;
+            fetch(this.dataset.url)
+            .then(response => response.json())
+            .then(data => {
+                data.reviews.forEach(review => {
+                    const card = document.createElement('div');
+                    card.className = 'card mb-3';
+                    const body = document.createElement('div');
+                    body.className = 'card-body';
+
+                    const header = document.createElement('div');
+                    header.className = 'd-flex justify-content-between';
+                    const author = document.createElement('strong');
+                    author.textContent = review.username;
+                    const date = document.createElement('span');
+                    date.className = 'text-muted small';
+                    date.textContent = new Date(review.created_at).toLocaleDateString(undefined, {
+                        month: 'short', day: '2-digit', year: 'numeric'
+                    });
+                    header.append(author, date);
+
+                    const stars = document.createElement('div');
+                    stars.className = 'mb-2';
+                    for (let i = 1; i <= 5; i++) {
+                        const star = document.createElement('i');
+                        star.className = `fas fa-star ${i <= review.rating ? 'text-warning' : 'text-muted'}`;
+                        stars.appendChild(star);
+                    }
+
+                    const comment = document.createElement('p');
+                    comment.className = 'mb-0';
+                    comment.style.whiteSpace = 'pre-line';
+                    comment.textContent = review.comment;
+
+                    body.append(header, stars, comment);
+                    card.appendChild(body);
+                    reviewList.appendChild(card);
+                });
+
+                if (data.next) {
+                    this.dataset.url = data.next;
+                    this.disabled = false;
+                } else {
+                    this.remove();
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                this.disabled = false;
+            });
+        });
+    }
+
     // Smooth scrolling for anchor links
     document.querySelectorAll('a[href^="#"]').forEach(anchor => {
         anchor.addEventListener('click', function (e) {